@@ -0,0 +1,60 @@
+# benchmarks/bench_json_encoder.py
+"""
+Benchmark: JSON encoder backends on realistic users_pages rows.
+
+Run from the backend directory:
+    python benchmarks/bench_json_encoder.py [pagesize]
+"""
+
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core.utils import json_encoder  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    now = datetime(2025, 12, 19, 17, 0, 0)
+    return [
+        {
+            "id": i,
+            "name": f"user{i:05d}",
+            "age": 20 + i % 50,
+            "birthdate": date(1990, 1, 1) + timedelta(days=i),
+            "sex": 1 + i % 2,
+            "status_code": "ACTIVE",
+            "remark": None,
+            "is_deleted": False,
+            "delete_reason": None,
+            "created_at": now,
+            "updated_at": now + timedelta(seconds=i),
+            "created_by_id": None,
+            "updated_by_id": None,
+            "created_by": "admin",
+            "updated_by": "admin",
+        }
+        for i in range(count)
+    ]
+
+
+def main(pagesize: int = 1000, number: int = 200):
+    rows = make_rows(pagesize)
+    print(f"{pagesize} rows, {number} iterations")
+
+    for name in json_encoder.BACKENDS:
+        try:
+            json_encoder.set_backend(name)
+        except ImportError:
+            print(f"{name:<8} not installed")
+            continue
+
+        size = len(json_encoder.dumps(rows))
+        elapsed = timeit.timeit(lambda: json_encoder.dumps(rows), number=number)
+        print(f"{name:<8} {elapsed / number * 1e3:8.3f} ms/page   {size} bytes")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -8,14 +8,7 @@ including API registration and server utilities.
 """
 
 # Expose main modules for easy import
-from core.api.api_core import ApiCore
-from core.api.api import Api
-from core.server.restful_server import RESTFulApiServer
-
-# Optional: create a default global API instance
-# This allows importing `from core import api` directly
-api_core = ApiCore()
-api = Api(api_core)
+from core.api import ApiCore, Api, api_core, api
 
 __all__ = [
     "ApiCore",
@@ -24,3 +17,11 @@ __all__ = [
     "api_core",
     "api",
 ]
+
+
+def __getattr__(name):
+    # The server pulls in Sanic; load it only when it is asked for
+    if name == "RESTFulApiServer":
+        from core.server.restful_server import RESTFulApiServer
+        return RESTFulApiServer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
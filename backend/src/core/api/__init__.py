@@ -9,9 +9,9 @@ Contains core API registration and server utilities.
 from core.api.api_core import ApiCore
 from core.api.api import Api
 
-# Default global instances for quick registration
-api_core = ApiCore()
-api = Api(api_core)
+# Default global instances, shared with Api.get_instance()
+api_core = ApiCore.get_instance()
+api = Api.get_instance()
 
 __all__ = [
     "ApiCore",
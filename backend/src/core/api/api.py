@@ -8,19 +8,23 @@ class Api:
 
     def __init__(self, api_core: ApiCore = None):
         if api_core is None:
-            api_core = ApiCore()
+            api_core = ApiCore.get_instance()
         self._api_core = api_core
 
     @classmethod
     def get_instance(cls) -> "Api":
         """
         Get the singleton Api instance.
-        If not created yet, create one.
+        If not created yet, create one bound to the singleton ApiCore.
         """
         if cls._instance is None:
             cls._instance = cls()
         return cls._instance
 
+    @property
+    def api_core(self) -> ApiCore:
+        return self._api_core
+
     def route(self, name: str = None, method: str = "GET", **kwargs):
         """
         Decorator to register a function as an API endpoint.
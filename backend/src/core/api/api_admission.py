@@ -0,0 +1,155 @@
+# core/api/api_admission.py
+
+"""
+Admission control
+-----------------
+Concurrency limit with a bounded FIFO wait queue. Requests that find the
+queue full, or wait longer than queue_timeout, are rejected at once
+instead of piling up on the event loop and the connection pool.
+
+Per endpoint through descriptor kwargs:
+
+    @api.get("users_pages", concurrency={"limit": 20, "max_queue": 50, "queue_timeout": 1})
+
+With adaptive={"target_latency": 0.5, "min_limit": 4, "max_limit": 200}
+the limit follows AIMD: +1/limit per request faster than the target,
+and a multiplicative decrease (at most once per target_latency) when a
+request is slower.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Seconds a rejection keeps the server reported as degraded
+DEGRADED_WINDOW = 5.0
+
+
+class ConcurrencyLimiter:
+    """
+    Concurrency limiter with bounded queue and optional AIMD limit.
+    """
+
+    # Time of the last rejection by any limiter in this process
+    last_shed: float = float("-inf")
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int = 0,
+        queue_timeout: float = 1.0,
+        adaptive: Optional[Dict[str, float]] = None,
+    ):
+        if limit < 1:
+            raise ValueError(f"Concurrency limit of {name} must be at least 1")
+        self.name = name
+        self.limit = float(limit)
+        self.max_queue = int(max_queue)
+        self.queue_timeout = float(queue_timeout)
+
+        self.adaptive = adaptive is not None
+        adaptive = adaptive or {}
+        self.target_latency = float(adaptive.get("target_latency", 0.5))
+        self.min_limit = float(adaptive.get("min_limit", 1))
+        self.max_limit = float(adaptive.get("max_limit", limit))
+        self.backoff = float(adaptive.get("backoff", 0.9))
+        self._last_decrease = float("-inf")
+
+        self.in_use = 0
+        self._waiters: deque = deque()
+
+        self.admitted = 0
+        self.rejected = 0
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot.
+
+        :return: False if the request must be rejected
+        """
+        if self.in_use < int(self.limit) and not self._waiters:
+            self.in_use += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            return self._reject()
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            return self._reject()
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            # Slot was handed over just before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+        self.admitted += 1
+        return True
+
+    def release(self, elapsed: Optional[float] = None):
+        """
+        Free a slot and hand it to the next waiter.
+
+        :param elapsed: Request latency, feeds the adaptive limit
+        """
+        if self.adaptive and elapsed is not None:
+            if elapsed > self.target_latency:
+                now = time.monotonic()
+                if now - self._last_decrease >= self.target_latency:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+        self.in_use -= 1
+        while self._waiters and self.in_use < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_use += 1
+                waiter.set_result(True)
+
+    def _remove(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _reject(self) -> bool:
+        self.rejected += 1
+        ConcurrencyLimiter.last_shed = time.monotonic()
+        return False
+
+    @classmethod
+    def is_shedding(cls) -> bool:
+        """
+        True while a request was rejected within DEGRADED_WINDOW seconds.
+        """
+        return time.monotonic() - cls.last_shed < DEGRADED_WINDOW
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_use": self.in_use,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def build_concurrency(api_name: str, option: Any) -> Optional[ConcurrencyLimiter]:
+    """
+    Build a ConcurrencyLimiter from the descriptor "concurrency" option.
+    """
+    if not option:
+        return None
+    if isinstance(option, dict):
+        return ConcurrencyLimiter(api_name, **option)
+    raise ValueError(f"Invalid concurrency option for {api_name}: {option!r}")
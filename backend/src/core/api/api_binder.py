@@ -0,0 +1,114 @@
+# core/api/api_binder.py
+
+import asyncio
+import inspect
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from core.exceptions import ParamError
+
+# HTTP methods allowed to carry a request body
+BODY_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+# Annotations that are coerced from the raw query string value
+COERCIBLE_TYPES = (int, float, bool)
+
+_MISSING = inspect.Parameter.empty
+
+
+class ApiBinder:
+    """
+    Precompiled argument binder for an API endpoint.
+
+    The endpoint signature is inspected once at registration time and
+    flattened into a tuple of (name, is_body, coercer, default) entries,
+    so the gateway only runs a tight loop per request.
+
+    With a BodySchema, the body is validated from the raw request bytes
+    and the parsed model is injected instead of a dict.
+    """
+
+    __slots__ = ("func", "is_coroutine", "params", "schema")
+
+    def __init__(self, func: Callable, schema=None):
+        self.func = func
+        self.is_coroutine = asyncio.iscoroutinefunction(func)
+        self.params: Tuple[Tuple[str, bool, Any, Any], ...] = self._compile(func)
+        self.schema = schema
+        if schema is not None and not any(is_body for _, is_body, _, _ in self.params):
+            raise ValueError(f"{func.__qualname__} declares a body schema but has no 'body' parameter")
+
+    @staticmethod
+    def _compile(func: Callable) -> Tuple[Tuple[str, bool, Any, Any], ...]:
+        params = []
+        for name, param in inspect.signature(func).parameters.items():
+            # *args / **kwargs cannot be filled from a request
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+
+            if name == "body":
+                params.append((name, True, None, _MISSING))
+                continue
+
+            coercer = param.annotation if param.annotation in COERCIBLE_TYPES else None
+            params.append((name, False, coercer, param.default))
+        return tuple(params)
+
+    def bind(
+        self,
+        method: str,
+        args: Mapping[str, Any],
+        load_body: Callable[[], dict],
+        load_raw: Optional[Callable[[], bytes]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the keyword arguments for the endpoint call.
+
+        :param method: HTTP method of the request
+        :param args: Query string parameters
+        :param load_body: Callable returning the parsed JSON body
+        :param load_raw: Callable returning the raw body bytes, used by schemas
+        :return: Keyword arguments for the endpoint function
+        """
+        call_args = {}
+        for name, is_body, coercer, default in self.params:
+
+            # Body injection rule
+            if is_body:
+                if method not in BODY_METHODS:
+                    raise ParamError("Request body not allowed for this method")
+                if self.schema is None:
+                    call_args[name] = load_body()
+                elif load_raw is not None:
+                    call_args[name] = self.schema.validate_json(load_raw())
+                else:
+                    call_args[name] = self.schema.validate_python(load_body())
+                continue
+
+            # Query string parameters
+            if name in args:
+                val = args.get(name)
+                if coercer is not None:
+                    try:
+                        val = coercer(val)
+                    except Exception:
+                        raise ParamError(f"Invalid value for parameter '{name}'")
+                call_args[name] = val
+                continue
+
+            # Use default value if provided
+            if default is not _MISSING:
+                call_args[name] = default
+                continue
+
+            # Missing required parameter
+            raise ParamError(f"Missing required parameter: {name}")
+
+        return call_args
+
+    async def call(self, call_args: Dict[str, Any]) -> Any:
+        """
+        Call the endpoint function with bound arguments.
+        """
+        if self.is_coroutine:
+            return await self.func(**call_args)
+        return self.func(**call_args)
@@ -0,0 +1,157 @@
+# core/api/api_cache.py
+
+"""
+In-process response cache
+-------------------------
+Encoded JSON bodies of GET endpoints, with their ETag, bounded by
+entry count (LRU) and total byte size, expired by TTL and invalidated
+by tag.
+
+Opt-in per endpoint through descriptor kwargs:
+
+    @api.get("users_pages", cache={"ttl": 30, "max_entries": 256,
+                                   "vary": ("status", "pageindex"), "tags": ("users",)})
+
+Write endpoints drop tagged caches after a successful call:
+
+    @api.post("users_create", invalidates=("users",))
+
+A read that started before the invalidation does not store its body:
+each clear() starts a new generation, and set() skips bodies computed
+in an older one.
+
+Caches and invalidation are per worker process. With API_WORKERS > 1,
+a write only clears the cache of the worker that served it; the other
+workers keep their entries until the TTL expires, so keep the TTL of
+cached endpoints short (seconds) where stale reads matter.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Defaults for keys missing from the descriptor "cache" option
+DEFAULT_TTL = 30.0
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of encoded response bodies for one endpoint.
+    """
+
+    def __init__(
+        self,
+        api_name: str,
+        ttl: float = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        vary: Optional[Iterable[str]] = None,
+        tags: Optional[Iterable[str]] = None,
+    ):
+        self.api_name = api_name
+        self.ttl = float(ttl)
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.vary: Optional[Tuple[str, ...]] = tuple(vary) if vary is not None else None
+        self.tags = frozenset(tags or ())
+
+        # key -> (expires_at, body, etag)
+        self._entries: "OrderedDict[Any, Tuple[float, bytes, Optional[str]]]" = OrderedDict()
+        self._bytes = 0
+
+        # Bumped by clear(); bodies computed before a clear are not stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, call_args: Dict[str, Any]) -> Any:
+        """
+        Cache key from the bound endpoint arguments.
+        Without vary, every argument is part of the key.
+        """
+        if self.vary is None:
+            return tuple(sorted(call_args.items()))
+        return tuple(call_args.get(name) for name in self.vary)
+
+    def get(self, key: Any) -> Optional[Tuple[bytes, Optional[str]]]:
+        """
+        Cached (body, etag), or None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, body, etag = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body, etag
+
+    def set(self, key: Any, body: bytes, etag: Optional[str] = None, generation: Optional[int] = None):
+        """
+        :param generation: self.generation read before the body was computed;
+                           the body is dropped if the cache was cleared since
+        """
+        if generation is not None and generation != self.generation:
+            return
+
+        size = len(body)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._drop(key)
+
+        self._entries[key] = (time.monotonic() + self.ttl, body, etag)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        self.generation += 1
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def _drop(self, key: Any):
+        _, body, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+def build_cache(api_name: str, option: Any) -> Optional[ResponseCache]:
+    """
+    Build a ResponseCache from the descriptor "cache" option.
+
+    :param option: True for defaults, or a dict of ResponseCache kwargs
+    """
+    if not option:
+        return None
+    if option is True:
+        return ResponseCache(api_name)
+    if isinstance(option, dict):
+        return ResponseCache(api_name, **option)
+    raise ValueError(f"Invalid cache option for {api_name}: {option!r}")
@@ -55,7 +55,9 @@ class ApiContext:
     path: Optional[str] = None
 
     # Runtime objects
-    session: Any = None
+    session: Any = None  # Opened lazily by database.aio_session.get_async_session()
+    replica_session: Any = None  # Read-only session on a replica, opened the same way
+    wrote: bool = False  # Set on the first write; later reads use the primary
     params: Any = None
     kwargs: Optional[Dict[str, Any]] = field(default_factory=dict)
 
@@ -90,3 +92,25 @@ class ApiContext:
 
         context.scoped_token = API_CONTEXT.set(context)
         return context
+
+    def reset(self):
+        """
+        Unbind this context from the current execution scope.
+        """
+        if self.scoped_token is not None:
+            API_CONTEXT.reset(self.scoped_token)
+            self.scoped_token = None
+
+    async def release(self):
+        """
+        Close the request sessions, if any were opened, and unbind the context.
+        Called once by the gateway when the request ends.
+        """
+        sessions = (self.session, self.replica_session)
+        self.session = self.replica_session = None
+        try:
+            for session in sessions:
+                if session is not None:
+                    await session.close()
+        finally:
+            self.reset()
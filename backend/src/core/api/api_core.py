@@ -1,18 +1,156 @@
 # core/api/api_core.py
 
-from typing import Dict, Any
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from core.api.api_admission import build_concurrency
+from core.api.api_binder import ApiBinder
+from core.api.api_cache import ResponseCache, build_cache
+from core.api.api_ratelimit import build_limiter
+from core.api.api_schema import build_schema
+from core.api.api_singleflight import build_singleflight
+
 
 class ApiCore:
+    _instance = None  # Singleton instance, the process-wide registry
+
     def __init__(self):
         self._api_registry: Dict[str, Dict[str, Any]] = {}
+        self._method_registry: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        # Response caches by invalidation tag
+        self._tagged_caches: Dict[str, List[ResponseCache]] = {}
+
+        # Frozen dispatch index, built once by freeze()
+        self._dispatch: Optional[Mapping[Tuple[str, str], Dict[str, Any]]] = None
+        self._allowed: Optional[Mapping[str, FrozenSet[str]]] = None
+        self._allow_headers: Optional[Mapping[str, str]] = None
+
+    @classmethod
+    def get_instance(cls) -> "ApiCore":
+        """
+        Get the singleton ApiCore shared by every Api instance.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
 
     def register_descriptor(self, api_name: str, descriptor: Dict[str, Any]):
         """
         Register a descriptor dict for an API endpoint.
+        The argument binder is compiled once here instead of per request.
         """
+        if self._dispatch is not None:
+            raise RuntimeError(f"Cannot register {api_name}: API registry is frozen")
         if "func" not in descriptor or not callable(descriptor["func"]):
             raise ValueError(f"Descriptor for {api_name} must have a callable 'func'")
+        descriptor["method"] = descriptor.get("method", "GET").upper()
+        schema = build_schema(api_name, descriptor.get("schema"))
+        descriptor["binder"] = ApiBinder(descriptor["func"], schema)
+
+        cache = build_cache(api_name, descriptor.get("cache"))
+        if cache is not None and descriptor["method"] != "GET":
+            raise ValueError(f"Response cache is only supported for GET APIs: {api_name}")
+        descriptor["response_cache"] = cache
+        for tag in cache.tags if cache is not None else ():
+            self._tagged_caches.setdefault(tag, []).append(cache)
+        descriptor["invalidates"] = tuple(descriptor.get("invalidates") or ())
+
+        coalescer = build_singleflight(api_name, descriptor.get("coalesce"))
+        if coalescer is not None and descriptor["method"] != "GET":
+            raise ValueError(f"Request coalescing is only supported for GET APIs: {api_name}")
+        descriptor["coalescer"] = coalescer
+        descriptor["rate_limiter"] = build_limiter(api_name, descriptor.get("rate_limit"))
+        descriptor["concurrency_limiter"] = build_concurrency(api_name, descriptor.get("concurrency"))
+
+        etag = descriptor.get("etag") or None
+        if etag is not None:
+            if descriptor["method"] != "GET":
+                raise ValueError(f"ETag is only supported for GET APIs: {api_name}")
+            if etag is not True and not callable(etag):
+                raise ValueError(f"ETag option for {api_name} must be True or a version callable")
+        descriptor["etag"] = etag
+
         self._api_registry[api_name] = descriptor
+        self._method_registry[(descriptor["method"], api_name)] = descriptor
 
     def get_registry(self):
         return self._api_registry
+
+    # ------------------------------
+    # Dispatch index
+    # ------------------------------
+    def freeze(self):
+        """
+        Build the (method, name) dispatch index and freeze the registry.
+        Called once at server startup; later registrations are rejected.
+        """
+        if self._dispatch is not None:
+            return
+
+        allowed: Dict[str, set] = {}
+        for method, api_name in self._method_registry:
+            allowed.setdefault(api_name, set()).add(method)
+
+        frozen_allowed = {}
+        allow_headers = {}
+        for api_name, methods in allowed.items():
+            methods |= {"OPTIONS"}
+            if "GET" in methods:
+                methods |= {"HEAD"}
+            frozen_allowed[api_name] = frozenset(methods)
+            allow_headers[api_name] = ", ".join(sorted(methods))
+
+        # Compile body validators before the first request
+        for descriptor in self._method_registry.values():
+            if descriptor["binder"].schema is not None:
+                descriptor["binder"].schema.compile()
+
+        self._allowed = MappingProxyType(frozen_allowed)
+        self._allow_headers = MappingProxyType(allow_headers)
+        self._dispatch = MappingProxyType(dict(self._method_registry))
+
+    def resolve(self, method: str, api_name: str) -> Optional[Dict[str, Any]]:
+        """
+        O(1) lookup of the descriptor registered for (method, name).
+        """
+        if self._dispatch is None:
+            self.freeze()
+        return self._dispatch.get((method, api_name))
+
+    def allowed_methods(self, api_name: str) -> Optional[FrozenSet[str]]:
+        """
+        Methods accepted by an API name, or None if the name is unknown.
+        """
+        if self._allowed is None:
+            self.freeze()
+        return self._allowed.get(api_name)
+
+    def allow_header(self, api_name: str) -> Optional[str]:
+        """
+        Prebuilt value for the HTTP Allow header of an API name.
+        """
+        if self._allow_headers is None:
+            self.freeze()
+        return self._allow_headers.get(api_name)
+
+    # ------------------------------
+    # Response cache
+    # ------------------------------
+    def invalidate(self, tags: Iterable[str]):
+        """
+        Clear every response cache tagged with one of tags.
+        """
+        for tag in tags:
+            for cache in self._tagged_caches.get(tag, ()):
+                cache.clear()
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Hit / miss / eviction counters of every cached API.
+        """
+        return {
+            api_name: descriptor["response_cache"].stats()
+            for api_name, descriptor in self._api_registry.items()
+            if descriptor.get("response_cache") is not None
+        }
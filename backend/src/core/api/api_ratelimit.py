@@ -0,0 +1,111 @@
+# core/api/api_ratelimit.py
+
+"""
+Token-bucket rate limiter
+-------------------------
+Opt-in per endpoint through descriptor kwargs:
+
+    @api.post("login", rate_limit={"rate": 5, "burst": 10, "by": ("ip",)})
+
+rate:     tokens refilled per second
+burst:    bucket capacity (defaults to rate)
+by:       key parts, any of "ip", "user" (the API name is always part of the key)
+max_keys: upper bound of tracked buckets, least recently used evicted first
+
+A bucket idle for burst / rate seconds is full again and therefore
+equivalent to a new one, so it is evicted without changing behaviour.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# Default upper bound of tracked buckets per endpoint
+DEFAULT_MAX_KEYS = 10000
+
+KEY_PARTS = frozenset(("ip", "user"))
+
+
+class TokenBucketLimiter:
+    """
+    O(1) token bucket per key, with LRU / idle eviction.
+    """
+
+    def __init__(
+        self,
+        api_name: str,
+        rate: float,
+        burst: Optional[float] = None,
+        by: Iterable[str] = ("ip",),
+        max_keys: int = DEFAULT_MAX_KEYS,
+    ):
+        if rate <= 0:
+            raise ValueError(f"Rate limit of {api_name} must be positive")
+        self.api_name = api_name
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.by = tuple(by)
+        if not set(self.by) <= KEY_PARTS:
+            raise ValueError(f"Rate limit key of {api_name} must be within {sorted(KEY_PARTS)}")
+        self.max_keys = int(max_keys)
+        self.idle_ttl = self.burst / self.rate
+
+        # key -> [tokens, last refill time]
+        self._buckets: "OrderedDict[Any, list]" = OrderedDict()
+
+        self.allowed = 0
+        self.rejected = 0
+
+    def make_key(self, ip: Optional[str], user: Optional[str]) -> Any:
+        parts = {"ip": ip, "user": user if user is not None else ip}
+        return tuple(parts[name] for name in self.by)
+
+    def acquire(self, key: Any) -> float:
+        """
+        Take one token.
+
+        :return: 0 if allowed, otherwise seconds until a token is available
+        """
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            self._evict(now)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1.0:
+            bucket[0] -= 1.0
+            self.allowed += 1
+            return 0.0
+
+        self.rejected += 1
+        return (1.0 - bucket[0]) / self.rate
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            oldest_key, oldest = next(iter(buckets.items()))
+            if len(buckets) <= self.max_keys and now - oldest[1] < self.idle_ttl:
+                break
+            del buckets[oldest_key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "keys": len(self._buckets),
+            "allowed": self.allowed,
+            "rejected": self.rejected,
+        }
+
+
+def build_limiter(api_name: str, option: Any) -> Optional[TokenBucketLimiter]:
+    """
+    Build a TokenBucketLimiter from the descriptor "rate_limit" option.
+    """
+    if not option:
+        return None
+    if isinstance(option, dict):
+        return TokenBucketLimiter(api_name, **option)
+    raise ValueError(f"Invalid rate_limit option for {api_name}: {option!r}")
@@ -1,7 +1,8 @@
-import json
 from enum import Enum
 from typing import Any, Callable, Dict, Optional
 
+from core.utils.json_encoder import dumps_str
+
 
 class ApiResponseType(Enum):
     STREAM = "stream"
@@ -193,4 +194,4 @@ class ApiResponse:
         )
 
     def __str__(self) -> str:
-        return json.dumps(self.to_json(), ensure_ascii=False)
+        return dumps_str(self.to_json())
@@ -0,0 +1,109 @@
+# core/api/api_schema.py
+
+"""
+Body schemas
+------------
+Declarative request body validation through descriptor kwargs:
+
+    @api.post("users_create", schema=UserCreate)
+    async def create_user(body: UserCreate): ...
+
+The schema is a pydantic model (or any type a TypeAdapter accepts), or a
+"module:attr" import string so API modules do not import pydantic. The
+compiled pydantic-core validator is built once per endpoint and the
+body is validated straight from the raw request bytes, before the
+endpoint runs and before any DB session is opened. The parsed model is
+injected as the endpoint's `body` argument.
+"""
+
+import importlib
+from typing import Any, Optional
+
+from core.exceptions import ParamError
+
+# Upper bound of validation errors echoed back to the client
+MAX_REPORTED_ERRORS = 5
+
+
+def _resolve(target: Any) -> Any:
+    if not isinstance(target, str):
+        return target
+    module_name, _, attr = target.partition(":")
+    if not attr:
+        raise ValueError(f"Schema import string must be 'module:attr': {target!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def format_errors(errors) -> str:
+    parts = []
+    for error in errors[:MAX_REPORTED_ERRORS]:
+        loc = ".".join(str(p) for p in error.get("loc", ())) or "body"
+        parts.append(f"{loc}: {error.get('msg', 'invalid')}")
+    if len(errors) > MAX_REPORTED_ERRORS:
+        parts.append(f"... {len(errors) - MAX_REPORTED_ERRORS} more")
+    return "; ".join(parts)
+
+
+class BodySchema:
+    """
+    Cached request body validator of one endpoint.
+    """
+
+    __slots__ = ("api_name", "target", "_adapter")
+
+    def __init__(self, api_name: str, target: Any):
+        self.api_name = api_name
+        self.target = target
+        self._adapter = None
+
+    def compile(self):
+        """
+        Build the validator; called at freeze() time or on first use.
+        """
+        if self._adapter is None:
+            from pydantic import TypeAdapter
+
+            self._adapter = TypeAdapter(_resolve(self.target))
+        return self._adapter
+
+    def validate_json(self, raw: Optional[bytes]) -> Any:
+        """
+        Parse and validate the raw request body in one pass.
+        """
+        if not raw:
+            raise ParamError("Request body is required")
+        adapter = self._adapter or self.compile()
+        try:
+            return adapter.validate_json(raw)
+        except ValueError as e:
+            raise ParamError(f"Invalid body: {self._describe(e)}")
+
+    def validate_python(self, body: Any) -> Any:
+        """
+        Validate an already decoded body (batch entries).
+        """
+        if body is None:
+            raise ParamError("Request body is required")
+        adapter = self._adapter or self.compile()
+        try:
+            return adapter.validate_python(body)
+        except ValueError as e:
+            raise ParamError(f"Invalid body: {self._describe(e)}")
+
+    @staticmethod
+    def _describe(error: ValueError) -> str:
+        errors = getattr(error, "errors", None)
+        if callable(errors):
+            return format_errors(errors(include_url=False, include_input=False))
+        return str(error)
+
+
+def build_schema(api_name: str, option: Any) -> Optional[BodySchema]:
+    """
+    Build a BodySchema from the descriptor "schema" option.
+    """
+    if option is None:
+        return None
+    if isinstance(option, (str, type)) or hasattr(option, "__origin__"):
+        return BodySchema(api_name, option)
+    raise ValueError(f"Invalid schema option for {api_name}: {option!r}")
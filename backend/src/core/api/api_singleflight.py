@@ -0,0 +1,119 @@
+# core/api/api_singleflight.py
+
+"""
+Single-flight request coalescing
+--------------------------------
+Concurrent identical reads share one execution and its result.
+
+Opt-in per GET endpoint through descriptor kwargs:
+
+    @api.get("users_pages", coalesce=True)
+    @api.get("users_pages", coalesce={"timeout": 5})
+
+The shared call runs as its own task, so a caller that disconnects
+does not cancel it for the others. The task gets its own read-only
+ApiContext: it is routed like any GET (read replicas, request-scoped
+lazy session) but never uses or closes the leader's session. Errors
+propagate to every waiter.
+Followers wait at most `timeout` seconds and then run the call
+themselves.
+"""
+
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from core.api.api_context import ApiContext
+
+# Default bound of a follower's wait, in seconds
+DEFAULT_TIMEOUT = 10.0
+
+
+class SingleFlight:
+    """
+    In-flight call registry for one endpoint.
+    """
+
+    def __init__(self, api_name: str, timeout: float = DEFAULT_TIMEOUT):
+        self.api_name = api_name
+        self.timeout = float(timeout)
+        self._calls: Dict[Any, asyncio.Task] = {}
+
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+
+    @staticmethod
+    def make_key(call_args: Dict[str, Any]) -> Any:
+        return tuple(sorted(call_args.items()))
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() once for all concurrent callers with the same key.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            # Fresh context: the shared call must not use the leader's request session
+            task = asyncio.get_running_loop().create_task(
+                self._run(fn, ApiContext.current()), context=contextvars.Context()
+            )
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            return await asyncio.shield(task)
+
+        self.followers += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return await fn()
+
+    async def _run(self, fn: Callable[[], Awaitable[Any]], leader: Optional[ApiContext]) -> Any:
+        """
+        Run the shared call in its own read-only ApiContext.
+        Request identity is copied from the leader so replica routing
+        still honours read-your-writes for that client.
+        """
+        context = ApiContext(apiname=self.api_name, apimethod="GET")
+        if leader is not None:
+            context.descriptor = leader.descriptor
+            context.user_id = leader.user_id
+            context.remote_addr = leader.remote_addr
+            context.x_forwarded_for = leader.x_forwarded_for
+            context.params = leader.params
+        ApiContext.create(context)
+        try:
+            return await fn()
+        finally:
+            await context.release()
+
+    def _done(self, key: Any, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved when every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "timeouts": self.timeouts,
+        }
+
+
+def build_singleflight(api_name: str, option: Any) -> Optional[SingleFlight]:
+    """
+    Build a SingleFlight from the descriptor "coalesce" option.
+
+    :param option: True for defaults, or a dict of SingleFlight kwargs
+    """
+    if not option:
+        return None
+    if option is True:
+        return SingleFlight(api_name)
+    if isinstance(option, dict):
+        return SingleFlight(api_name, **option)
+    raise ValueError(f"Invalid coalesce option for {api_name}: {option!r}")
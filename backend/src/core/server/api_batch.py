@@ -0,0 +1,218 @@
+# core/server/api_batch.py
+
+"""
+Batch execution
+---------------
+Run many registry calls from one HTTP request.
+
+Each entry is {"api": name, "method": "GET", "args": {...}, "body": {...}}
+and is resolved and bound exactly like a gateway request. Results are
+returned in request order as {"status": 200, "data": ...} or
+{"status": <http status>, "error": message}.
+
+Entries count against the same rate limits and admission slots (global
+and per endpoint) as gateway requests; a shed entry answers 503. Each
+entry is recorded in the API metrics under its own (api, method), with
+no response size. Entries bypass the response cache and ETags: every
+entry runs its endpoint.
+"""
+
+import asyncio
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional
+
+from sanic.exceptions import SanicException
+from sanic.log import logger
+
+from core.api.api_context import ApiContext
+from core.api.api_response import ApiResponse
+from core.const.secrets import CODES
+from core.exceptions import ApiException, ParamError
+from core.server.metrics import UNKNOWN_API, status_code_to_code
+
+# Upper bound of entries accepted in one batch request
+MAX_BATCH_SIZE = 50
+
+# Methods that never write and may share one DB session
+READONLY_METHODS = frozenset(("GET",))
+
+
+def _error(status: int, message: str, code: Any = None) -> Dict[str, Any]:
+    item = {"status": status, "error": message}
+    if code is not None:
+        item["code"] = code
+    return item
+
+
+async def run_entry(
+    api_core,
+    entry: Any,
+    client_ip: Optional[str] = None,
+    user: Optional[str] = None,
+    admission=None,
+    forwarded_for: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Resolve, bind and call a single batch entry.
+
+    :param client_ip: Client address, for rate limits and read-your-writes
+    :param user: Authenticated user id, if any
+    :param admission: Optional global ConcurrencyLimiter of the gateway
+    :param forwarded_for: X-Forwarded-For header of the batch request
+    """
+    if not isinstance(entry, dict) or not isinstance(entry.get("api"), str):
+        return _error(400, "Batch entry must be an object with an 'api' name")
+
+    api_name = entry["api"]
+    method = str(entry.get("method") or "GET").upper()
+    args = entry.get("args") or {}
+    body = entry.get("body")
+
+    descriptor = api_core.resolve(method, api_name)
+    if descriptor is None:
+        if api_core.allowed_methods(api_name) is None:
+            return _error(404, f"API {api_name} with method {method} not found")
+        return _error(405, f"API {api_name} does not support method {method}")
+
+    # Batch entries count against the same per-endpoint rate limits
+    limiter = descriptor["rate_limiter"]
+    if limiter is not None and limiter.acquire(limiter.make_key(client_ip, user)):
+        return _error(429, "API request limit reached", CODES.API_REQUEST_LIMIT_REACHED)
+
+    # Admission control: global, then per endpoint
+    admitted = []
+    for concurrency in (admission, descriptor["concurrency_limiter"]):
+        if concurrency is None:
+            continue
+        if not await concurrency.acquire():
+            for held in admitted:
+                held.release()
+            return _error(503, "Service temporarily unavailable", CODES.SERVICE_UNAVAILABLE)
+        admitted.append(concurrency)
+
+    start = perf_counter()
+    try:
+        context = ApiContext(
+            apiname=api_name,
+            apimethod=method,
+            descriptor=descriptor,
+            user_id=user,
+            remote_addr=client_ip,
+            x_forwarded_for=forwarded_for,
+        )
+        return await _call_entry(api_core, context, args, body)
+    finally:
+        elapsed = perf_counter() - start
+        for held in reversed(admitted):
+            held.release(elapsed)
+
+
+async def _call_entry(api_core, context: ApiContext, args: Any, body: Any) -> Dict[str, Any]:
+    api_name, method, descriptor = context.apiname, context.apimethod, context.descriptor
+
+    def load_body() -> dict:
+        if not isinstance(body, dict):
+            raise ParamError("JSON body must be an object")
+        return body
+
+    # Each entry gets its own context and, at most, its own session
+    context = ApiContext.create(context)
+    try:
+        if not isinstance(args, dict):
+            raise ParamError("args must be an object")
+        binder = descriptor["binder"]
+        context.params = binder.bind(method, args, load_body)
+        result = await binder.call(context.params)
+        if descriptor["invalidates"]:
+            api_core.invalidate(descriptor["invalidates"])
+    except ApiException as e:
+        return _error(400, str(e), e.code)
+    except SanicException as e:
+        return _error(e.status_code, str(e))
+    except Exception:
+        # Driver and SQL errors stay in the worker log
+        logger.exception("Batch entry %s %s failed", method, api_name)
+        return _error(500, "Internal server error", CODES.UNKNOWN_ERROR)
+    finally:
+        await context.release()
+
+    if isinstance(result, ApiResponse):
+        if result.type is not None:
+            return _error(400, f"API {api_name} returns {result.type.value}, not allowed in batch")
+        if result.status_code >= 300:
+            return _error(result.status_code, result.body or "")
+        result = result.to_json()
+
+    return {"status": 200, "data": result}
+
+
+def _entry_label(api_core, entry: Any):
+    """
+    (api, method) metrics labels of an entry.
+    """
+    if not isinstance(entry, dict):
+        return UNKNOWN_API, "GET"
+    api_name = entry.get("api")
+    method = str(entry.get("method") or "GET").upper()
+    if not isinstance(api_name, str) or api_core.allowed_methods(api_name) is None:
+        return UNKNOWN_API, method
+    return api_name, method
+
+
+async def run_batch(
+    api_core,
+    entries: List[Any],
+    session_scope: Optional[Callable] = None,
+    client_ip: Optional[str] = None,
+    user: Optional[str] = None,
+    admission=None,
+    metrics=None,
+    forwarded_for: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run batch entries concurrently and return results in entry order.
+
+    :param session_scope: Optional async context manager factory. When set,
+                          read-only entries run one after another inside a
+                          single scope (an AsyncSession is not safe for
+                          concurrent use) while writes still run concurrently.
+    :param metrics: Optional ApiMetrics recording every entry
+    :param forwarded_for: X-Forwarded-For header of the batch request
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(entries)
+
+    async def run_at(index: int):
+        if metrics is None:
+            results[index] = await run_entry(api_core, entries[index], client_ip, user, admission, forwarded_for)
+            return
+
+        label, method = _entry_label(api_core, entries[index])
+        metrics.start(label, method)
+        start = perf_counter()
+        code = CODES.UNKNOWN_ERROR
+        try:
+            item = await run_entry(api_core, entries[index], client_ip, user, admission, forwarded_for)
+            code = item["code"] if "code" in item else status_code_to_code(item["status"])
+            results[index] = item
+        finally:
+            metrics.finish(label, method, code, perf_counter() - start, None)
+
+    shared = []
+    tasks = []
+    for index, entry in enumerate(entries):
+        method = str(entry.get("method") or "GET").upper() if isinstance(entry, dict) else "GET"
+        if session_scope is not None and method in READONLY_METHODS:
+            shared.append(index)
+        else:
+            tasks.append(run_at(index))
+
+    async def run_shared():
+        async with session_scope():
+            for index in shared:
+                await run_at(index)
+
+    if shared:
+        tasks.append(run_shared())
+
+    await asyncio.gather(*tasks)
+    return results
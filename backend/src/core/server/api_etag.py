@@ -0,0 +1,95 @@
+# core/server/api_etag.py
+
+"""
+ETag / conditional GET
+----------------------
+Opt-in per endpoint through the descriptor "etag" option:
+
+- etag=True:      strong ETag from a hash of the encoded response body
+- etag=<async fn>: version-token mode. The function receives the bound
+                   endpoint arguments and returns a cheap version token
+                   (e.g. max(updated_at) and row count), so a 304 is
+                   decided before the endpoint runs. The token is only
+                   read for requests with If-None-Match and on response
+                   cache misses; cache hits reuse the ETag stored with
+                   the body.
+
+ETags are computed on the identity body. When the response is then
+compressed, the compressor appends the coding to the ETag ("<tag>-gzip"),
+so each representation has its own strong validator, and If-None-Match
+accepts any of them.
+"""
+
+import hashlib
+from typing import Any, Dict, Optional
+
+from sanic.response import empty
+
+# Content codings the compressor may apply, see encoded_etag()
+ENCODINGS = ("br", "gzip")
+
+
+def _digest(data: bytes) -> str:
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def content_etag(body: bytes) -> str:
+    """
+    Strong ETag of an encoded response body.
+    """
+    return _digest(body)
+
+
+def version_etag(api_name: str, call_args: Dict[str, Any], token: Any) -> str:
+    """
+    Strong ETag from a version token and the endpoint arguments.
+    """
+    key = repr((api_name, tuple(sorted(call_args.items())), token))
+    return _digest(key.encode())
+
+
+def encoded_etag(etag: str, coding: str) -> str:
+    """
+    ETag of the representation compressed with coding.
+    """
+    if etag.startswith("W/"):
+        return f"W/{encoded_etag(etag[2:], coding)}"
+    if len(etag) < 2 or not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _identity_etag(candidate: str) -> str:
+    for coding in ENCODINGS:
+        suffix = f'-{coding}"'
+        if candidate.endswith(suffix):
+            return candidate[:-len(suffix)] + '"'
+    return candidate
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    If-None-Match comparison (weak comparison, as RFC 9110 requires).
+    Validators of compressed representations match their identity ETag.
+
+    :return: The matching validator as sent by the client, or None
+    """
+    if not if_none_match:
+        return None
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        opaque = candidate[2:] if candidate.startswith("W/") else candidate
+        if _identity_etag(opaque) == etag:
+            return candidate
+    return None
+
+
+def not_modified(etag: str):
+    """
+    304 answer; etag is the validator the client matched, so a cached
+    compressed representation keeps its own ETag.
+    """
+    return empty(status=304, headers={"ETag": etag})
@@ -0,0 +1,136 @@
+# core/server/api_transport.py
+
+"""
+ApiResponse transports
+----------------------
+Map ApiResponse objects returned by endpoints to Sanic responses:
+
+- STREAM:      chunked transfer from a (async) generator
+- FILE:        whole file response, promoted to FILE_STREAM when large
+- FILE_STREAM: chunked file streaming with HTTP Range / 206 support
+- otherwise:   JSON envelope from ApiResponse.to_json()
+"""
+
+from typing import Any
+
+from aiofiles.os import stat as stat_async
+from sanic.exceptions import HeaderNotFound, NotFound
+from sanic.handlers import ContentRangeHandler
+from sanic.request import Request
+from sanic.response import file, file_stream, raw, text as sanic_text
+
+from core.api.api_response import ApiResponse, ApiResponseType
+from core.utils.json_encoder import dumps as json_dumps
+
+# Files above this size are never read into worker memory
+FILE_STREAM_THRESHOLD = 1024 * 1024
+
+# Read size for chunked file streaming
+FILE_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _to_bytes(chunk: Any) -> bytes:
+    if isinstance(chunk, (bytes, bytearray, memoryview)):
+        return bytes(chunk)
+    return str(chunk).encode()
+
+
+def json_response(result: Any, status: int = 200, headers: dict = None):
+    """
+    Encode an endpoint result with the configured JSON backend
+    and write the bytes straight into the response.
+    """
+    return json_bytes_response(json_dumps(result), status=status, headers=headers)
+
+
+def json_bytes_response(body: bytes, status: int = 200, headers: dict = None):
+    """
+    Response from an already encoded JSON body.
+    """
+    return raw(body, status=status, headers=headers, content_type="application/json")
+
+
+async def send_stream(request: Request, result: ApiResponse):
+    """
+    Chunked streaming of the items produced by streaming_fn().
+    streaming_fn may return an async iterator or a plain iterable.
+
+    The response is already sent when this returns, so it returns None
+    for the handler to return; the status and byte count are left in
+    request.ctx.streamed as (status, bytes) for metrics.
+    """
+    response = await request.respond(
+        headers=result.headers,
+        content_type=result.content_type or "text/plain",
+    )
+    chunks = result.streaming_fn()
+    sent = 0
+
+    if hasattr(chunks, "__aiter__"):
+        async for chunk in chunks:
+            data = _to_bytes(chunk)
+            sent += len(data)
+            await response.send(data)
+    else:
+        for chunk in chunks:
+            data = _to_bytes(chunk)
+            sent += len(data)
+            await response.send(data)
+
+    await response.eof()
+    request.ctx.streamed = (response.status, sent)
+    return None
+
+
+async def send_file(request: Request, result: ApiResponse):
+    """
+    File response with Range support.
+    Small FILE responses are sent in one piece, everything else is streamed.
+    """
+    try:
+        stats = await stat_async(result.path)
+    except FileNotFoundError:
+        raise NotFound(f"File not found: {result.filename or result.path}")
+
+    try:
+        _range = ContentRangeHandler(request, stats)
+    except HeaderNotFound:
+        _range = None
+
+    headers = dict(result.headers)
+    headers.setdefault("Accept-Ranges", "bytes")
+
+    if result.type is ApiResponseType.FILE and stats.st_size <= FILE_STREAM_THRESHOLD:
+        return await file(
+            result.path,
+            mime_type=result.content_type,
+            headers=headers,
+            filename=result.filename,
+            _range=_range,
+        )
+
+    return await file_stream(
+        result.path,
+        chunk_size=FILE_STREAM_CHUNK_SIZE,
+        mime_type=result.content_type,
+        headers=headers,
+        filename=result.filename,
+        _range=_range,
+    )
+
+
+async def send_api_response(request: Request, result: ApiResponse):
+    """
+    Dispatch an ApiResponse to its transport.
+    Returns None for STREAM, which is sent before this returns.
+    """
+    if result.type is ApiResponseType.STREAM:
+        return await send_stream(request, result)
+
+    if result.type in (ApiResponseType.FILE, ApiResponseType.FILE_STREAM):
+        return await send_file(request, result)
+
+    if result.status_code >= 300:
+        return sanic_text(result.body or "", status=result.status_code, headers=result.headers)
+
+    return json_response(result.to_json(), status=result.status_code, headers=result.headers)
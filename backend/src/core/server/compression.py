@@ -0,0 +1,146 @@
+# core/server/compression.py
+
+"""
+Response compression
+--------------------
+Accept-Encoding negotiation (br, gzip) applied as a response middleware.
+
+- Bodies below min_size are sent as is
+- Only content types matching content_types are compressed
+- Bodies above offload_size are compressed in the default thread pool
+  so the event loop is not blocked
+- A compressed body that is not smaller than the original is discarded
+- The ETag of a compressed body gets the coding as suffix ("<tag>-gzip"),
+  so identity and compressed representations never share a validator
+"""
+
+import asyncio
+import gzip
+from typing import Dict, Iterable, Optional
+
+from core.server.api_etag import encoded_etag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Default content types (prefixes) worth compressing
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+# Status codes whose body must not be touched
+_SKIP_STATUS = frozenset((204, 206, 304))
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse Accept-Encoding into {coding: q}.
+    """
+    prefs = {}
+    if not header:
+        return prefs
+
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        prefs[coding] = q
+    return prefs
+
+
+class ResponseCompressor:
+    """
+    Negotiated response compression.
+    """
+
+    def __init__(
+        self,
+        min_size: int = 1024,
+        offload_size: int = 256 * 1024,
+        content_types: Iterable[str] = DEFAULT_CONTENT_TYPES,
+        brotli_quality: int = 4,
+        gzip_level: int = 6,
+    ):
+        self.min_size = min_size
+        self.offload_size = offload_size
+        self.content_types = tuple(content_types)
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+
+        # Server preference order
+        self.codings = ("br", "gzip") if brotli is not None else ("gzip",)
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Pick the coding with the highest q value, ties broken by server order.
+        """
+        prefs = parse_accept_encoding(accept_encoding)
+        if not prefs:
+            return None
+
+        best, best_q = None, 0.0
+        for coding in self.codings:
+            q = prefs.get(coding, prefs.get("*", 0.0))
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def is_compressible(self, content_type: Optional[str]) -> bool:
+        if not content_type:
+            return False
+        return content_type.lower().startswith(self.content_types)
+
+    def compress(self, coding: str, body: bytes) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, request, response):
+        """
+        Compress the response body in place when negotiation allows it.
+        """
+        body = getattr(response, "body", None)
+        if not body or len(body) < self.min_size:
+            return
+        if request.method == "HEAD" or response.status in _SKIP_STATUS:
+            return
+        if "content-encoding" in response.headers or "content-range" in response.headers:
+            return
+        if not self.is_compressible(response.content_type):
+            return
+
+        coding = self.negotiate(request.headers.get("accept-encoding"))
+        if coding is None:
+            return
+
+        if len(body) >= self.offload_size:
+            loop = asyncio.get_running_loop()
+            compressed = await loop.run_in_executor(None, self.compress, coding, body)
+        else:
+            compressed = self.compress(coding, body)
+
+        response.headers.add("Vary", "Accept-Encoding")
+        if len(compressed) >= len(body):
+            return
+
+        response.body = compressed
+        response.headers["Content-Encoding"] = coding
+        response.headers.pop("content-length", None)
+        etag = response.headers.get("etag")
+        if etag:
+            response.headers["ETag"] = encoded_etag(etag, coding)
@@ -0,0 +1,77 @@
+# core/server/drain.py
+
+"""
+Graceful drain
+--------------
+Shutdown sequence of a worker, run from the before_server_stop listener
+while the listening socket is still open:
+
+1. Flip /__check to STOP
+2. Keep serving for health_delay seconds so the load balancer notices
+3. Reject new API requests with 503 and Connection: close
+4. Wait for in-flight requests, at most deadline seconds
+
+Sanic then closes the listener and runs after_server_stop, where the
+engine pool is disposed.
+"""
+
+import asyncio
+from typing import Callable, Optional
+
+from sanic.log import logger
+
+
+class Drainer:
+    """
+    In-flight request tracking and drain sequence of one worker.
+    """
+
+    def __init__(self, health_delay: float = 0.0, deadline: float = 15.0):
+        self.health_delay = float(health_delay)
+        self.deadline = float(deadline)
+        self.in_flight = 0
+        self.draining = False
+        self._idle: Optional[asyncio.Event] = None
+
+    def reset(self):
+        """
+        Accept requests again, before the server (re)starts.
+        """
+        self.draining = False
+        self._idle = None
+
+    def enter(self) -> bool:
+        """
+        Count a new request.
+
+        :return: False if the worker is draining and the request must be rejected
+        """
+        if self.draining:
+            return False
+        self.in_flight += 1
+        return True
+
+    def leave(self):
+        self.in_flight -= 1
+        if self.in_flight == 0 and self._idle is not None:
+            self._idle.set()
+
+    async def drain(self, on_stopping: Callable[[], None]):
+        """
+        Run the drain sequence.
+
+        :param on_stopping: Flips the health check to STOP
+        """
+        on_stopping()
+        if self.health_delay > 0:
+            await asyncio.sleep(self.health_delay)
+
+        self.draining = True
+        if self.in_flight == 0:
+            return
+
+        self._idle = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._idle.wait(), self.deadline)
+        except asyncio.TimeoutError:
+            logger.warning("Drain deadline reached with %d request(s) in flight", self.in_flight)
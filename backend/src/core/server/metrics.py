@@ -0,0 +1,214 @@
+# core/server/metrics.py
+
+"""
+API metrics
+-----------
+Per (api, method) latency and payload size histograms, request counts
+by CODES value and in-flight gauges, exposed in Prometheus text format.
+
+Recording is a few dict lookups and a bisect per request. In multi-worker
+mode every worker dumps a JSON snapshot into a shared directory, and the
+exposition endpoint merges the snapshots of all workers.
+"""
+
+import json
+import os
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.const.secrets import CODES
+
+# Latency bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response size bucket upper bounds, in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Label used for API names that are not registered
+UNKNOWN_API = "__unknown__"
+
+_SEP = "\t"
+
+
+def status_code_to_code(status: int):
+    """
+    Map an HTTP status to the CODES value used as metrics label.
+    """
+    if status < 400:
+        return CODES.SUCCESS
+    if status == 404:
+        return CODES.UNREGISTERED_METHOD
+    if status == 405:
+        return CODES.INVALID_METHOD
+    if status == 400:
+        return CODES.PARAMETER_INVALID
+    if status == 429:
+        return CODES.API_REQUEST_LIMIT_REACHED
+    if status == 503:
+        return CODES.SERVICE_UNAVAILABLE
+    return CODES.UNKNOWN_ERROR
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def dump(self) -> List[float]:
+        return self.counts + [self.sum, self.count]
+
+
+class ApiMetrics:
+    """
+    Metrics registry of one worker process.
+    """
+
+    def __init__(self):
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.size: Dict[Tuple[str, str], Histogram] = {}
+        self.requests: Dict[Tuple[str, str, Any], int] = {}
+        self.in_flight: Dict[Tuple[str, str], int] = {}
+
+    def start(self, api_name: str, method: str):
+        key = (api_name, method)
+        self.in_flight[key] = self.in_flight.get(key, 0) + 1
+
+    def finish(self, api_name: str, method: str, code: Any, elapsed: float, size: Optional[int]):
+        key = (api_name, method)
+        self.in_flight[key] -= 1
+
+        histogram = self.latency.get(key)
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(LATENCY_BUCKETS)
+        histogram.observe(elapsed)
+
+        if size is not None:
+            histogram = self.size.get(key)
+            if histogram is None:
+                histogram = self.size[key] = Histogram(SIZE_BUCKETS)
+            histogram.observe(size)
+
+        counter = (api_name, method, code)
+        self.requests[counter] = self.requests.get(counter, 0) + 1
+
+    # ------------------------------
+    # Snapshots (multi-worker aggregation)
+    # ------------------------------
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "latency": {_SEP.join(k): h.dump() for k, h in self.latency.items()},
+            "size": {_SEP.join(k): h.dump() for k, h in self.size.items()},
+            "requests": {_SEP.join((a, m, str(c))): n for (a, m, c), n in self.requests.items()},
+            "in_flight": {_SEP.join(k): n for k, n in self.in_flight.items()},
+        }
+
+    def dump(self, directory: str):
+        """
+        Atomically write this worker's snapshot to directory/<pid>.json.
+        """
+        path = Path(directory) / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, path)
+
+    def collect(self, directory: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Merge the live snapshot with the snapshots of the other workers.
+        """
+        merged = self.snapshot()
+        if not directory:
+            return merged
+
+        own = f"{os.getpid()}.json"
+        for path in Path(directory).glob("*.json"):
+            if path.name == own:
+                continue
+            try:
+                other = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for section, series in other.items():
+                target = merged.setdefault(section, {})
+                for key, value in series.items():
+                    if key not in target:
+                        target[key] = value
+                    elif isinstance(value, list):
+                        target[key] = [a + b for a, b in zip(target[key], value)]
+                    else:
+                        target[key] += value
+        return merged
+
+
+def clear_directory(directory: str):
+    """
+    Remove snapshots left by a previous server run.
+    """
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    for snapshot in path.glob("*.json"):
+        snapshot.unlink(missing_ok=True)
+
+
+# ------------------------------
+# Prometheus text exposition
+# ------------------------------
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+
+
+def _render_histogram(lines: List[str], name: str, help_text: str, buckets, series: Dict[str, List[float]]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key in sorted(series):
+        api_name, method = key.split(_SEP)
+        values = series[key]
+        base = _labels(api=api_name, method=method)
+        cumulative = 0
+        for bound, count in zip(buckets, values):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{base},le="{bound}"}} {cumulative}')
+        cumulative += values[len(buckets)]
+        lines.append(f'{name}_bucket{{{base},le="+Inf"}} {cumulative}')
+        lines.append(f"{name}_sum{{{base}}} {values[-2]}")
+        lines.append(f"{name}_count{{{base}}} {int(values[-1])}")
+
+
+def render_prometheus(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    lines: List[str] = []
+
+    _render_histogram(
+        lines, "opspilot_api_request_duration_seconds", "API request latency in seconds",
+        LATENCY_BUCKETS, snapshot.get("latency", {}),
+    )
+    _render_histogram(
+        lines, "opspilot_api_response_size_bytes", "API response body size in bytes",
+        SIZE_BUCKETS, snapshot.get("size", {}),
+    )
+
+    lines.append("# HELP opspilot_api_requests_total API requests by result code (CODES)")
+    lines.append("# TYPE opspilot_api_requests_total counter")
+    for key, value in sorted(snapshot.get("requests", {}).items()):
+        api_name, method, code = key.split(_SEP)
+        lines.append(f"opspilot_api_requests_total{{{_labels(api=api_name, method=method, code=code)}}} {value}")
+
+    lines.append("# HELP opspilot_api_in_flight API requests in progress")
+    lines.append("# TYPE opspilot_api_in_flight gauge")
+    for key, value in sorted(snapshot.get("in_flight", {}).items()):
+        api_name, method = key.split(_SEP)
+        lines.append(f"opspilot_api_in_flight{{{_labels(api=api_name, method=method)}}} {value}")
+
+    return "\n".join(lines) + "\n"
@@ -1,19 +1,60 @@
 # core/server/restful_server.py
 from sanic import Sanic
 from sanic.request import Request
-from sanic.response import json as sanic_json, text as sanic_text
-from sanic.exceptions import NotFound, InvalidUsage
+from sanic.response import text as sanic_text, empty
+from sanic.exceptions import NotFound, InvalidUsage, SanicException
+from sanic.worker.loader import AppLoader
+from functools import partial
+from time import perf_counter
+from typing import Callable, Optional
 import asyncio
+import math
 import platform
-import inspect
+import re
 
-from sanic_cors import CORS
+from core.api.api_admission import ConcurrencyLimiter
+from core.api.api_context import ApiContext
+from core.api.api_response import ApiResponse
+from core.const.secrets import CODES
+from core.exceptions import ApiException, ParamError
+from core.server.api_batch import MAX_BATCH_SIZE, run_batch
+from core.server.api_etag import content_etag, matching_etag, not_modified, version_etag
+from core.server.compression import ResponseCompressor
+from core.server.drain import Drainer
+from core.server.metrics import ApiMetrics, UNKNOWN_API, render_prometheus, status_code_to_code
+from core.server.api_transport import json_bytes_response, json_response, send_api_response
+from core.utils.json_encoder import dumps as json_dumps
 
-app = Sanic("OpsPilotAPI")
-# Enable CORS for all routes
-CORS(app, automatic_options=True)
+app: Optional[Sanic] = None
 is_stopped = False
 
+# Reserved API name of the batch gateway
+BATCH_API_NAME = "_batch"
+
+# Seconds between metrics snapshots in multi-worker mode
+METRICS_DUMP_INTERVAL = 5
+
+
+def get_app(route: str = "/api") -> Sanic:
+    """
+    Create the Sanic app on first use, with CORS enabled for all routes.
+
+    OPTIONS requests are answered by sanic_cors, except on the API
+    gateway: method_fallback() answers those with the Allow header of
+    the API, and CORS headers are still added to its response.
+    """
+    global app
+    if app is None:
+        from sanic_cors import CORS
+
+        gateway = f"{re.escape(route)}/(?!{BATCH_API_NAME}$)"
+        app = Sanic("OpsPilotAPI")
+        CORS(app, automatic_options=True, resources={
+            f"^{gateway}.+": {"automatic_options": False},
+            f"^(?!{gateway}).*": {},
+        })
+    return app
+
 
 def parse_body(request: Request) -> dict:
     """
@@ -37,18 +78,90 @@ def parse_body(request: Request) -> dict:
     return body
 
 
+def build_context(request: Request, api_name: str, descriptor: dict) -> ApiContext:
+    """
+    Populate the request metadata of an ApiContext once per request.
+    """
+    headers = request.headers
+    return ApiContext(
+        apiname=api_name,
+        apimethod=request.method,
+        descriptor=descriptor,
+        referer=headers.get("referer"),
+        remote_addr=request.remote_addr or request.ip,
+        x_forwarded_for=headers.get("x-forwarded-for"),
+        user_agent=headers.get("user-agent"),
+        host=request.host,
+        url=request.url,
+        path=request.path,
+    )
+
+
+def draining_response():
+    """
+    Rejection of new requests while the worker drains.
+    """
+    return json_response(
+        {"code": CODES.SERVICE_UNAVAILABLE, "message": "Server is shutting down"},
+        status=503,
+        headers={"Connection": "close", "Retry-After": "1"},
+    )
+
+
+def method_fallback(api_core, method: str, api_name: str):
+    """
+    Answer requests with no (method, name) match without binding:
+    - Unknown API name: 404
+    - OPTIONS / HEAD: prebuilt empty answer with Allow header
+    - Any other method: 405 with Allow header
+    """
+    allow = api_core.allow_header(api_name)
+    if allow is None:
+        return sanic_text(
+            f"API {api_name} with method {method} not found",
+            status=404,
+        )
+
+    headers = {"Allow": allow}
+    if method == "OPTIONS":
+        return empty(status=204, headers=headers)
+    if method == "HEAD" and "HEAD" in api_core.allowed_methods(api_name):
+        return empty(status=200, headers=headers)
+
+    return sanic_text(
+        f"API {api_name} does not support method {method}",
+        status=405,
+        headers=headers,
+    )
+
+
 class RESTFulApiServer:
     @staticmethod
-    def run_api_server(
-        host: str = "0.0.0.0",
-        port: int = 7000,
+    def create_app(
         route: str = "/api",
-        workers: int = 1,
         api_core=None,
-    ):
+        batch_session_scope: Optional[Callable] = None,
+        compressor: Optional[ResponseCompressor] = None,
+        metrics_dir: Optional[str] = None,
+        admission: Optional[ConcurrencyLimiter] = None,
+        drainer: Optional[Drainer] = None,
+    ) -> Sanic:
+        """
+        Register middleware and routes on the Sanic app.
+        Runs once per process: in the main process and in every worker.
+
+        :param batch_session_scope: Optional async context manager factory
+                                    shared by read-only batch entries
+        :param compressor: Optional negotiated response compression
+        :param metrics_dir: Directory shared by workers for metrics snapshots
+        :param admission: Optional global concurrency limit of the gateway
+        :param drainer: Graceful drain settings of the worker
+        """
         if api_core is None:
             raise ValueError("api_core must be provided")
 
+        app = get_app(route)
+
         @app.middleware("request")
         async def attach_context(request: Request):
             """
@@ -56,6 +169,14 @@ class RESTFulApiServer:
             """
             request.ctx.api_core = api_core
 
+        if compressor is not None:
+            @app.middleware("response")
+            async def compress_response(request: Request, response):
+                """
+                Negotiated br / gzip compression of large bodies
+                """
+                await compressor(request, response)
+
         @app.exception(NotFound)
         async def ignore_404s(_, __):
             """
@@ -63,89 +184,349 @@ class RESTFulApiServer:
             """
             return sanic_text("404 not found")
 
-        @app.route(f"{route}/<api_name:path>", methods={"GET", "POST", "PUT", "DELETE"})
+        @app.exception(ApiException)
+        async def api_exception(_, e: ApiException):
+            """
+            Business errors raised by services, answered with their CODES value
+            """
+            return json_response({"code": e.code, "message": str(e)}, status=400)
+
+        # Registry is complete once all API modules are imported
+        api_core.freeze()
+
+        metrics = ApiMetrics()
+
+        drainer = drainer or Drainer()
+        app.config.GRACEFUL_SHUTDOWN_TIMEOUT = drainer.deadline
+
+        @app.listener("before_server_start")
+        async def reset_drain(_, __):
+            """
+            The same app may be served again in this process (test clients, reloads)
+            """
+            global is_stopped
+            is_stopped = False
+            drainer.reset()
+
+        @app.listener("before_server_stop")
+        async def drain_requests(_, __):
+            """
+            Flip the health check, then wait for in-flight requests
+            """
+            def stopping():
+                global is_stopped
+                is_stopped = True
+
+            await drainer.drain(stopping)
+
+        if metrics_dir:
+            @app.listener("after_server_start")
+            async def start_metrics_dump(app_, _):
+                async def dump_loop():
+                    while True:
+                        metrics.dump(metrics_dir)
+                        await asyncio.sleep(METRICS_DUMP_INTERVAL)
+
+                app_.add_task(dump_loop())
+
+            @app.listener("before_server_stop")
+            async def stop_metrics_dump(_, __):
+                metrics.dump(metrics_dir)
+
+        @app.route(
+            f"{route}/<api_name:path>",
+            methods={"GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS"},
+        )
         async def api_gateway(request: Request, api_name: str):
+            """
+            Gateway entry: in-flight tracking for graceful drain
+            """
+            if not drainer.enter():
+                return draining_response()
+
+            try:
+                return await measure_api(request, api_name)
+            finally:
+                drainer.leave()
+
+        async def measure_api(request: Request, api_name: str):
+            """
+            Record metrics around dispatch_api
+            """
+            method = request.method
+            label = api_name if api_core.allowed_methods(api_name) is not None else UNKNOWN_API
+            metrics.start(label, method)
+            start = perf_counter()
+            code = CODES.UNKNOWN_ERROR
+            size = None
+            try:
+                response = await dispatch_api(request, api_name)
+                if response is None:
+                    # Streamed by send_stream(), already sent
+                    status, size = getattr(request.ctx, "streamed", (200, None))
+                else:
+                    status = response.status
+                    body = getattr(response, "body", None)
+                    size = len(body) if body is not None else None
+                code = status_code_to_code(status)
+                return response
+            except ApiException as e:
+                code = e.code
+                raise
+            except SanicException as e:
+                code = status_code_to_code(e.status_code)
+                raise
+            finally:
+                metrics.finish(label, method, code, perf_counter() - start, size)
+
+        async def dispatch_api(request: Request, api_name: str):
             """
             Central API gateway:
-            - Resolve API function
+            - Resolve API function by (method, name)
             - Parse parameters
             - Inject body / query parameters
             - Call endpoint function
             """
-            descriptor = api_core.get_registry().get(api_name)
+            descriptor = api_core.resolve(request.method, api_name)
             if not descriptor:
-                return sanic_text(
-                    f"API {api_name} with method {request.method} not found",
-                    status=404,
-                )
+                return method_fallback(api_core, request.method, api_name)
 
             # Fault tolerance: ensure function exists
-            func = descriptor.get("func")
-            if func is None or not callable(func):
+            binder = descriptor.get("binder")
+            if binder is None:
                 return sanic_text(
                     f"API {api_name} has no callable function registered",
                     status=500,
                 )
 
-            sig = inspect.signature(func)
-            call_args = {}
+            # Rate limit before the body is parsed or a session is taken
+            limiter = descriptor["rate_limiter"]
+            if limiter is not None:
+                ip = request.remote_addr or request.ip
+                retry_after = limiter.acquire(
+                    limiter.make_key(ip, getattr(request.ctx, "user_id", None))
+                )
+                if retry_after:
+                    return json_response(
+                        {"code": CODES.API_REQUEST_LIMIT_REACHED, "message": "API request limit reached"},
+                        status=429,
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    )
+
+            # Admission control: global, then per endpoint
+            limiters = [c for c in (admission, descriptor["concurrency_limiter"]) if c is not None]
+            admitted = []
+            for concurrency in limiters:
+                if not await concurrency.acquire():
+                    for held in admitted:
+                        held.release()
+                    return json_response(
+                        {"code": CODES.SERVICE_UNAVAILABLE, "message": "Service temporarily unavailable"},
+                        status=503,
+                        headers={"Retry-After": "1"},
+                    )
+                admitted.append(concurrency)
+
+            # Request-scoped context; the DB session is opened on first use
+            start = perf_counter()
+            context = ApiContext.create(build_context(request, api_name, descriptor))
+            try:
+                return await call_api(request, api_name, descriptor, binder, context)
+            finally:
+                await context.release()
+                elapsed = perf_counter() - start
+                for held in reversed(admitted):
+                    held.release(elapsed)
+
+        async def call_api(request: Request, api_name: str, descriptor: dict, binder, context: ApiContext):
+            """
+            Bind arguments and call the endpoint inside its ApiContext
+            """
+            # -------------------------------
+            # Unified parameter injection logic (precompiled binder)
+            # -------------------------------
+            try:
+                call_args = binder.bind(
+                    request.method, request.args, lambda: parse_body(request), lambda: request.body
+                )
+            except ParamError as e:
+                raise InvalidUsage(str(e))
+            context.params = call_args
 
             # -------------------------------
-            # Unified parameter injection logic
+            # Call endpoint function
             # -------------------------------
-            for name, param in sig.parameters.items():
+            etag_option = descriptor["etag"]
+            version_mode = etag_option is not None and etag_option is not True
+            if_none_match = request.headers.get("If-None-Match") if etag_option is not None else None
+            etag = None
 
-                # Body injection rule
-                if name == "body":
-                    if request.method not in ("POST", "PUT", "PATCH", "DELETE"):
-                        raise InvalidUsage("Request body not allowed for this method")
+            # Version-token ETag: decide 304 before the endpoint runs.
+            # Without a validator to compare, the token is only needed on a cache miss.
+            if version_mode and if_none_match:
+                etag = version_etag(api_name, call_args, await etag_option(**call_args))
+                matched = matching_etag(if_none_match, etag)
+                if matched is not None:
+                    return not_modified(matched)
 
-                    call_args[name] = parse_body(request)
-                    continue
+            cache = descriptor["response_cache"]
+            body = None
+            if cache is not None:
+                cache_key = cache.make_key(call_args)
+                # A write that invalidates the cache while this call runs wins
+                generation = cache.generation
+                cached = cache.get(cache_key)
+                # An entry cached under an older version token is outdated
+                if cached is not None and (etag is None or cached[1] == etag):
+                    body, etag = cached
 
-                # Query string parameters
-                if name in request.args:
-                    val = request.args.get(name)
+            if body is None:
+                if version_mode and etag is None:
+                    # Token read before the endpoint, so it never claims a newer state than the body
+                    etag = version_etag(api_name, call_args, await etag_option(**call_args))
 
-                    # Type casting based on annotation
-                    if param.annotation in (int, float, bool):
-                        try:
-                            val = param.annotation(val)
-                        except Exception:
-                            raise InvalidUsage(
-                                f"Invalid value for parameter '{name}'"
-                            )
+                coalescer = descriptor["coalescer"]
+                if coalescer is not None:
+                    # Identical in-flight reads share one execution
+                    result = await coalescer.do(
+                        coalescer.make_key(call_args), lambda: binder.call(call_args)
+                    )
+                else:
+                    result = await binder.call(call_args)
 
-                    call_args[name] = val
-                    continue
+                # Writes drop the cached reads they affect
+                if descriptor["invalidates"]:
+                    api_core.invalidate(descriptor["invalidates"])
 
-                # Use default value if provided
-                if param.default is not inspect._empty:
-                    call_args[name] = param.default
-                    continue
+                # Stream / file / envelope responses have their own transport
+                if isinstance(result, ApiResponse):
+                    return await send_api_response(request, result)
 
-                # Missing required parameter
-                raise InvalidUsage(f"Missing required parameter: {name}")
+                body = json_dumps(result)
+                if etag_option is True:
+                    etag = content_etag(body)
+                if cache is not None:
+                    cache.set(cache_key, body, etag, generation)
 
-            # -------------------------------
-            # Call endpoint function
-            # -------------------------------
-            if asyncio.iscoroutinefunction(func):
-                result = await func(**call_args)
-            else:
-                result = func(**call_args)
+            if etag_option is None:
+                return json_bytes_response(body)
+
+            # Content-hash ETag, computed once per cached body
+            if etag_option is True:
+                matched = matching_etag(if_none_match, etag)
+                if matched is not None:
+                    return not_modified(matched)
+
+            return json_bytes_response(body, headers={"ETag": etag})
+
+        @app.post(f"{route}/{BATCH_API_NAME}")
+        async def api_batch(request: Request):
+            """
+            Batch gateway: run many registry calls in one HTTP request.
 
-            return sanic_json(result)
+            Body: [entry, ...] or {"requests": [entry, ...], "share_session": bool}
+            """
+            try:
+                body = request.json
+            except Exception:
+                raise InvalidUsage("Invalid JSON body")
+
+            share_session = False
+            if isinstance(body, dict):
+                share_session = bool(body.get("share_session"))
+                body = body.get("requests")
+
+            if not isinstance(body, list):
+                raise InvalidUsage("Batch body must be an array of requests")
+            if len(body) > MAX_BATCH_SIZE:
+                raise InvalidUsage(f"Batch accepts at most {MAX_BATCH_SIZE} requests")
+
+            session_scope = batch_session_scope if share_session else None
+            if not drainer.enter():
+                return draining_response()
+            try:
+                results = await run_batch(
+                    api_core,
+                    body,
+                    session_scope,
+                    client_ip=request.remote_addr or request.ip,
+                    user=getattr(request.ctx, "user_id", None),
+                    admission=admission,
+                    metrics=metrics,
+                    forwarded_for=request.headers.get("x-forwarded-for"),
+                )
+            finally:
+                drainer.leave()
+            return json_response(results)
 
         @app.route("/__check")
         async def health(_):
             """
             Health check endpoint
             """
-            return sanic_text("STOP" if is_stopped else "OK")
+            if is_stopped:
+                return sanic_text("STOP")
+            if ConcurrencyLimiter.is_shedding():
+                # Ask the load balancer to back off while requests are shed
+                return sanic_text("DEGRADED", status=503)
+            return sanic_text("OK")
+
+        @app.route("/__metrics")
+        async def metrics_endpoint(_):
+            """
+            Prometheus text exposition, aggregated across workers
+            """
+            return sanic_text(
+                render_prometheus(metrics.collect(metrics_dir)),
+                content_type="text/plain; version=0.0.4; charset=utf-8",
+            )
+
+        @app.route("/__cache")
+        async def cache_stats(_):
+            """
+            Response cache counters per API
+            """
+            return json_response(api_core.cache_stats())
+
+        return app
+
+    @staticmethod
+    def run_api_server(
+        host: str = "0.0.0.0",
+        port: int = 7000,
+        route: str = "/api",
+        workers: int = 1,
+        api_core=None,
+        app_factory: Optional[Callable[[], Sanic]] = None,
+        unix: Optional[str] = None,
+    ):
+        """
+        Start the API server.
+
+        :param workers: Number of worker processes
+        :param api_core: ApiCore for single process mode
+        :param app_factory: Module level callable returning the app,
+                            required for multiple workers since every
+                            worker process builds its own app, engine and pool
+        :param unix: Bind to this Unix socket path instead of host:port
+        """
+        if app_factory is None:
+            if api_core is None:
+                raise ValueError("api_core or app_factory must be provided")
+            if workers > 1:
+                raise ValueError("app_factory is required for multiple workers")
+            app_factory = partial(RESTFulApiServer.create_app, route=route, api_core=api_core)
+
+        # Sanic binds host:port once in the main process; workers accept
+        # on that shared socket
+        bind = {"unix": unix} if unix else {"host": host, "port": port}
+
+        print(f"Starting OpsPilot API server at {unix or f'http://{host}:{port}'} with {workers} worker(s) ...")
+        if workers <= 1 or platform.system() == "Windows":
+            app_factory().run(**bind, single_process=True)
+            return
 
-        print(f"Starting OpsPilot API server at http://{host}:{port} ...")
-        if platform.system() == "Windows":
-            app.run(host=host, port=port, workers=1, single_process=True)
-        else:
-            app.run(host=host, port=port, workers=workers)
+        loader = AppLoader(factory=app_factory)
+        app = loader.load()
+        app.prepare(**bind, workers=workers)
+        Sanic.serve(primary=app, app_loader=loader)
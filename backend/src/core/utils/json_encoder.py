@@ -0,0 +1,132 @@
+# core/utils/json_encoder.py
+
+"""
+Pluggable JSON encoder
+----------------------
+Single entry point for encoding API results to JSON bytes.
+
+Backends, in order of preference: orjson, ujson, stdlib json.
+The backend can be forced with the OPSPILOT_JSON_BACKEND environment
+variable or set_backend(). date / datetime / UUID / Decimal are
+encoded natively by every backend.
+"""
+
+import json
+import os
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict
+
+__all__ = [
+    'BACKENDS',
+    'dumps',
+    'dumps_str',
+    'get_backend',
+    'set_backend',
+]
+
+
+def _default(obj: Any) -> Any:
+    """
+    Fallback for types the backend does not handle itself.
+    """
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# ------------------------------
+# Backend factories
+# ------------------------------
+def _orjson_dumps() -> Callable[[Any], bytes]:
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=option)
+
+    return dumps
+
+
+def _ujson_dumps() -> Callable[[Any], bytes]:
+    import ujson
+
+    def dumps(obj: Any) -> bytes:
+        return ujson.dumps(obj, ensure_ascii=False, default=_default).encode()
+
+    return dumps
+
+
+def _json_dumps() -> Callable[[Any], bytes]:
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default)
+
+    def dumps(obj: Any) -> bytes:
+        return encoder.encode(obj).encode()
+
+    return dumps
+
+
+BACKENDS: Dict[str, Callable[[], Callable[[Any], bytes]]] = {
+    'orjson': _orjson_dumps,
+    'ujson': _ujson_dumps,
+    'json': _json_dumps,
+}
+
+_backend_name: str = ''
+_dumps: Callable[[Any], bytes] = None
+
+
+def set_backend(name: str = None) -> str:
+    """
+    Select the JSON backend.
+
+    :param name: 'orjson', 'ujson', 'json' or None for the fastest available
+    :return: Name of the backend in use
+    """
+    global _backend_name, _dumps
+
+    if name:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown JSON backend: {name}")
+        _dumps = BACKENDS[name]()
+        _backend_name = name
+        return name
+
+    for candidate, factory in BACKENDS.items():
+        try:
+            _dumps = factory()
+        except ImportError:
+            continue
+        _backend_name = candidate
+        return candidate
+
+    raise RuntimeError("No JSON backend available")
+
+
+def get_backend() -> str:
+    return _backend_name
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode obj to UTF-8 JSON bytes with the active backend.
+    """
+    return _dumps(obj)
+
+
+def dumps_str(obj: Any) -> str:
+    """
+    Encode obj to a JSON str with the active backend.
+    """
+    return _dumps(obj).decode()
+
+
+set_backend(os.getenv('OPSPILOT_JSON_BACKEND') or None)
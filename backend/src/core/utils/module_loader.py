@@ -1,25 +1,154 @@
 # core/utils/module_loader.py
 
+import hashlib
 import importlib
+import json
 import pkgutil
 import sys
 from pathlib import Path
+from time import perf_counter
+from typing import List, Optional, Tuple
 
-def import_modules(package_name: str):
+MANIFEST_VERSION = 2
+
+
+def _package_path(package_name: str) -> Path:
+    # Ensure the parent directory of the package is in sys.path
+    package_path = Path(__file__).parent.parent.parent / package_name
+    if str(package_path.parent) not in sys.path:
+        sys.path.append(str(package_path.parent))
+    return package_path
+
+
+def discover_modules(package_name: str) -> List[str]:
+    """
+    Names of all *_api modules under the package, in sorted order.
+    """
+    package_path = _package_path(package_name)
+    return sorted(
+        f"{package_name}.{name}"
+        for _, name, _ in pkgutil.iter_modules([str(package_path)])
+        if name.endswith("_api")
+    )
+
+
+def module_fingerprint(package_name: str, modules: List[str]) -> str:
+    """
+    Hash of the module names and their source modification times.
+    """
+    package_path = _package_path(package_name)
+    digest = hashlib.blake2b(digest_size=16)
+    for full_module_name in modules:
+        name = full_module_name.rsplit(".", 1)[-1]
+        source = package_path / f"{name}.py"
+        if not source.exists():
+            source = package_path / name / "__init__.py"
+        mtime = source.stat().st_mtime_ns if source.exists() else 0
+        digest.update(f"{full_module_name}:{mtime}\n".encode())
+    return digest.hexdigest()
+
+
+def import_modules(package_name: str, manifest: Optional[str] = None, report: bool = False) -> List[Tuple[str, float]]:
     """
     Auto-import all *_api.py modules under the specified package
     to trigger decorators (like Api route registration).
 
+    Modules are imported in a deterministic (sorted) order. With a
+    manifest path, the manifest is rewritten whenever the fingerprint
+    of the discovered modules (names and mtimes) differs from the one
+    stored in it, so added, removed or edited API modules never leave
+    it stale. The manifest is an output for tools: startup always
+    discovers and imports the modules itself.
+
     :param package_name: Package/folder to search for modules
                          e.g., 'webapi'
+    :param manifest: Optional path of the endpoint manifest to keep current
+    :param report: Print each imported module and its import time
+    :return: [(module name, import seconds)]
     """
-    # Ensure the parent directory of the package is in sys.path
-    package_path = Path(__file__).parent.parent.parent / package_name
-    if str(package_path.parent) not in sys.path:
-        sys.path.append(str(package_path.parent))
+    modules = discover_modules(package_name)
 
-    for finder, name, ispkg in pkgutil.iter_modules([str(package_path)]):
-        if name.endswith("_api"):
-            full_module_name = f"{package_name}.{name}"
-            importlib.import_module(full_module_name)
+    timings = []
+    for full_module_name in modules:
+        start = perf_counter()
+        importlib.import_module(full_module_name)
+        timings.append((full_module_name, perf_counter() - start))
+        if report:
             print(f"Imported {full_module_name}")
+
+    if manifest:
+        fingerprint = module_fingerprint(package_name, modules)
+        if not Path(manifest).exists() or load_manifest(manifest).get("fingerprint") != fingerprint:
+            write_manifest(manifest, modules, fingerprint)
+
+    if report:
+        print_import_report(timings)
+    return timings
+
+
+def print_import_report(timings: List[Tuple[str, float]]):
+    """
+    Print module import costs, most expensive first.
+    The first module to import a shared dependency pays for it.
+    """
+    print("Import time report:")
+    for name, seconds in sorted(timings, key=lambda t: t[1], reverse=True):
+        print(f"  {seconds * 1000:9.2f} ms  {name}")
+    print(f"  {sum(t for _, t in timings) * 1000:9.2f} ms  total")
+
+
+# ------------------------------
+# Endpoint manifest
+# ------------------------------
+def build_manifest(modules: List[str], fingerprint: Optional[str] = None) -> dict:
+    """
+    Deterministic manifest of API modules and the endpoints they register.
+    """
+    from core.api.api_core import ApiCore
+
+    endpoints = []
+    for (method, api_name), descriptor in sorted(ApiCore.get_instance()._method_registry.items()):
+        func = descriptor["func"]
+        endpoints.append({
+            "name": api_name,
+            "method": method,
+            "module": func.__module__,
+            "func": func.__qualname__,
+        })
+    return {
+        "version": MANIFEST_VERSION,
+        "fingerprint": fingerprint,
+        "modules": list(modules),
+        "endpoints": endpoints,
+    }
+
+
+def write_manifest(path: str, modules: List[str], fingerprint: Optional[str] = None):
+    Path(path).write_text(json.dumps(build_manifest(modules, fingerprint), indent=2, sort_keys=True) + "\n")
+
+
+def load_manifest(path: str) -> dict:
+    """
+    Read a manifest written by write_manifest().
+    Tools that only need the endpoint list can use it without importing any API module.
+    """
+    data = json.loads(Path(path).read_text())
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data
+
+
+if __name__ == "__main__":
+    # python -m core.utils.module_loader webapi endpoints.json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import API modules and write the endpoint manifest")
+    parser.add_argument("package", nargs="?", default="webapi")
+    parser.add_argument("manifest", nargs="?", default=None)
+    args = parser.parse_args()
+
+    timings = import_modules(args.package, report=True)
+    if args.manifest:
+        modules = [name for name, _ in timings]
+        write_manifest(args.manifest, modules, module_fingerprint(args.package, modules))
+        print(f"Manifest written to {args.manifest}")
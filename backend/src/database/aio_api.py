@@ -7,20 +7,28 @@ Provides common CRUD operations based on SQLAlchemy async ORM.
 import uuid
 from typing import Union, List, Optional, Iterable
 
+import sqlalchemy as sa
+
 from core.api.api_response import ApiResponse
 from core.api.api_context import ApiContext
 from core.exceptions import ApiException, ApiError
 from core.utils.assertion import Assert
 
 from database.orm import ModelBase
-from database.aio_session import scope_session
+from database.aio_session import Query, scope_session, get_async_session
+from database.bulk import copy_rows, delete_rows, insert_rows, update_rows
+from database.counting import count_rows
+from database.keyset import KeysetPaginator
+from database.projection import public_columns
 
 __all__ = [
     'add',
+    'add_many',
     'find',
     'fetch',
     'fetch_pages',
     'update',
+    'update_many',
     'delete',
     'restore',
 ]
@@ -40,12 +48,34 @@ def ensure_list(value: Union[str, Iterable]) -> List:
 # ------------------------------
 # CRUD Operations
 # ------------------------------
-async def add(table: ModelBase, model: dict, context: Optional[ApiContext] = None, conflict_nothing: Optional[str] = None):
+async def add(table: ModelBase, model: Union[dict, List[dict]], context: Optional[ApiContext] = None,
+              conflict_nothing: Optional[Union[str, List[str]]] = None, copy: bool = False):
+    """
+    Insert one model, or a list of models in bulk.
+
+    A list is written with multi-row INSERT ... ON CONFLICT DO NOTHING and
+    returns per-row results (see database.bulk); copy=True loads it with
+    COPY instead, all or nothing, and returns the row count.
+    """
+    if isinstance(model, list):
+        return await add_many(table, model, conflict_nothing, copy)
     Assert.is_not_dict(model, 'model cannot be empty')
     model.setdefault('id', uuid.uuid4().hex)
     return await scope_session.add(table, conflict_nothing=conflict_nothing, **model)
 
 
+async def add_many(table: ModelBase, models: List[dict], conflict_nothing: Optional[Union[str, List[str]]] = None,
+                   copy: bool = False):
+    Assert.is_not_list(models, 'models cannot be empty')
+    for model in models:
+        Assert.is_not_dict(model, 'model cannot be empty')
+        model.setdefault('id', uuid.uuid4().hex)
+    async with get_async_session(readonly=False) as session:
+        if copy:
+            return await copy_rows(session, table.__table__, models)
+        return await insert_rows(session, table.__table__, models, conflict=ensure_list(conflict_nothing))
+
+
 async def find(table: ModelBase, id: str, has_deleted: bool = False):
     Assert.is_not_null(id, 'id cannot be null')
     query = scope_session.select(table).where(table.id == id)
@@ -55,15 +85,27 @@ async def find(table: ModelBase, id: str, has_deleted: bool = False):
 
 
 async def fetch(table: ModelBase, columns: List, criterions: Optional[List] = None):
+    """
+    Select columns of the live rows with Core, without ORM instances.
+    One column returns its values, several return dicts keyed by column name.
+    """
     Assert.is_not_list(columns, 'columns', True)
     Assert.is_not_list(criterions, 'criterions', True)
     query = scope_session.select(*columns)
     if hasattr(table, 'is_deleted'):
         query = query.where(table.is_deleted == False)
-    return await query.where_criterions(table, criterions).fetch()
-
-
-async def update(table: ModelBase, model: dict):
+    query = query.where_criterions(criterions)
+    if len(columns) == 1:
+        return await query.fetch()
+    return await query.fetchdicts()
+
+
+async def update(table: ModelBase, model: Union[dict, List[dict]]):
+    """
+    Update one model by id, or a list of models in bulk with per-row results.
+    """
+    if isinstance(model, list):
+        return await update_many(table, model)
     Assert.is_not_dict(model, 'model cannot be empty')
     record_id = model.pop('id', None)
     if not record_id:
@@ -71,8 +113,25 @@ async def update(table: ModelBase, model: dict):
     return await scope_session.update(table).where(table.id == record_id).values(**model).execute()
 
 
+async def update_many(table: ModelBase, models: List[dict]):
+    Assert.is_not_list(models, 'models cannot be empty')
+    for model in models:
+        Assert.is_not_dict(model, 'model cannot be empty')
+    criterions = [table.is_deleted == False] if hasattr(table, 'is_deleted') else []
+    async with get_async_session(readonly=False) as session:
+        return await update_rows(session, table.__table__, models, criterions=criterions)
+
+
 async def delete(table: ModelBase, id: Union[str, List[str]], delete_reason: str = None, permanent: bool = False):
+    """
+    Delete by id. A list of ids returns per-id results (see database.bulk).
+    """
     Assert.is_not_null(id, 'id cannot be null')
+    if isinstance(id, (list, tuple, set)):
+        soft = hasattr(table, 'is_deleted') and not permanent
+        async with get_async_session(readonly=False) as session:
+            return await delete_rows(session, table.__table__, list(id), soft=soft,
+                                     values={'delete_reason': delete_reason} if soft else None)
     ids = ensure_list(id)
     if hasattr(table, 'is_deleted') and not permanent:
         return await scope_session.update(table).where(table.id.in_(ids)).values(is_deleted=True, delete_reason=delete_reason).execute()
@@ -88,7 +147,25 @@ async def restore(table: ModelBase, ids: Union[str, List[str]], **values):
 
 
 async def fetch_pages(table: ModelBase, pageindex: int = 0, pagesize: int = 10, criterions: Optional[List] = None,
-                      sortby: Optional[str] = None, descending: bool = False, deleted: bool = False):
+                      sortby: Optional[str] = None, descending: bool = False, deleted: bool = False,
+                      cursor: Optional[str] = None, keyset: bool = False, sortable: Optional[Iterable[str]] = None,
+                      count: str = 'exact', columns: Optional[List] = None):
+    """
+    Page through a table.
+
+    Offset mode (default) reads page pageindex. Keyset mode (keyset=True or
+    a cursor) seeks from the opaque cursor of a previous page instead and
+    returns exts={"next_cursor", "prev_cursor"}; sortby must be one of
+    sortable (default: the table columns) and id breaks ties.
+
+    count selects how the total is obtained: exact, estimate, cached or
+    none (see database.counting); exts.has_more is always set.
+
+    Rows are returned as dicts: ORM instances through the model serializer
+    (see database.orm), or with columns (names or columns, e.g.
+    public_columns(table)) as dicts of those columns read with Core;
+    columns in table.__exclude__ are rejected (see database.projection).
+    """
     Assert.is_not_null(table, 'table cannot be null')
     Assert.is_not_int(pageindex, 'pageindex')
     Assert.is_not_int(pagesize, 'pagesize')
@@ -98,9 +175,41 @@ async def fetch_pages(table: ModelBase, pageindex: int = 0, pagesize: int = 10,
     pageindex = max(pageindex, 0)
     pagesize = max(pagesize, 1)
 
-    query = scope_session.select(table).where_criterions(table, criterions)
-    if hasattr(table, 'is_deleted'):
-        query = query.where(table.is_deleted == deleted)
-
-    data, total = await query.order_by_with(table, sortby, descending).limit(pagesize).offset(pageindex * pagesize).fetchpages()
-    return ApiResponse.success(data=data, total=total)
+    paginator = KeysetPaginator(table, sortby or 'id', descending, sortable) if keyset or cursor else None
+
+    as_dicts = columns is not None
+    if as_dicts:
+        selected = list(public_columns(table, columns))
+        if paginator is not None:
+            # Cursors are built from the sort column and id of each row
+            for name in dict.fromkeys((paginator.sortby, paginator.id_name)):
+                if name not in {c.key for c in selected}:
+                    selected.append(table.__table__.c[name])
+        stmt = sa.select(*selected)
+    else:
+        stmt = sa.select(table)
+
+    # Total and page read in one session
+    async with get_async_session() as session:
+        query = Query(session, stmt).where_criterions(criterions)
+        if hasattr(table, 'is_deleted'):
+            query = query.where(table.is_deleted == deleted)
+
+        if paginator is not None:
+            total, estimated = await count_rows(session, query.stmt, count)
+            query = query.keyset(paginator, cursor, pagesize)
+            rows = (await session.execute(query.stmt)).all() if as_dicts else await query.fetch()
+            data, next_cursor, prev_cursor = paginator.page(rows, cursor, pagesize)
+            data = [row._asdict() for row in data] if as_dicts else table.serialize_many(data)
+            exts = {'next_cursor': next_cursor, 'prev_cursor': prev_cursor, 'has_more': next_cursor is not None}
+            if estimated:
+                exts['estimated'] = True
+            return ApiResponse.success(data=data, total=total, exts=exts)
+
+        query = query.order_by_with(table, sortby, descending).limit(pagesize).offset(pageindex * pagesize)
+        page = await query.fetchpage(count, as_dicts)
+    data = page.data if as_dicts else table.serialize_many(page.data)
+    exts = {'has_more': page.has_more}
+    if page.estimated:
+        exts['estimated'] = True
+    return ApiResponse.success(data=data, total=page.total, exts=exts)
@@ -5,33 +5,188 @@ Async SQLAlchemy session scope for OpsPilot
 Provides async session context for CRUD operations.
 """
 
-from typing import Any, List, Optional, Tuple
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
 import sqlalchemy as sa
 import os
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 
+from core.api.api_context import ApiContext
 from core.exceptions import ApiError
-from dotenv import load_dotenv
+from database import replicas, statements
+from database.counting import Page, fetch_page
+from database.projection import fetch_dicts
 
 # ------------------------------
 # Engine & Session Factory
 # ------------------------------
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../.env"))
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL not set in environment")
+# Read from .env by database_url() on first use, not at import time
+DATABASE_URL: Optional[str] = None
 
-engine = create_async_engine(DATABASE_URL, pool_pre_ping=True, echo=False)
-AsyncSessionFactory = async_sessionmaker(bind=engine, expire_on_commit=False)
+# Created per process by init_engine(), never shared across a fork
+engine = None
+AsyncSessionFactory = None
+_engine_pid: Optional[int] = None
+
+# Methods whose sessions go to a read replica unless told otherwise
+READ_METHODS = frozenset(("GET", "HEAD"))
+
+# Session shared by read-only batch entries
+_shared_session: ContextVar[Optional[AsyncSession]] = ContextVar("_shared_session", default=None)
+
+
+def database_url() -> str:
+    """
+    Load .env once and return DATABASE_URL.
+    """
+    global DATABASE_URL
+    if DATABASE_URL is None:
+        from dotenv import load_dotenv
+
+        load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../../.env"))
+        DATABASE_URL = os.getenv("DATABASE_URL") or ""
+
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL not set in environment")
+    return DATABASE_URL
+
+
+def pool_settings() -> dict:
+    """
+    Per-worker connection pool sizing from the environment.
+    """
+    return {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+    }
+
+
+def replica_settings() -> dict:
+    """
+    Read replica URLs and routing from the environment.
+    """
+    urls = os.getenv("DATABASE_REPLICA_URLS", "")
+    return {
+        "urls": [url.strip() for url in urls.split(",") if url.strip()],
+        "max_lag": float(os.getenv("DB_REPLICA_MAX_LAG", "5")),
+        "check_interval": float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "2")),
+        "sticky_seconds": float(os.getenv("DB_READ_YOUR_WRITES", "5")),
+    }
+
+
+def init_engine(**pool_kwargs):
+    """
+    Create the engine and session factory for the current process,
+    and the replica engines when DATABASE_REPLICA_URLS is set.
+    Engines inherited from a parent process are dropped without
+    closing the parent's connections, and fresh pools are created.
+    """
+    global engine, AsyncSessionFactory, _engine_pid
+
+    pid = os.getpid()
+    if engine is not None:
+        if _engine_pid == pid:
+            return engine
+        engine.sync_engine.dispose(close=False)
+        if replicas.replica_set is not None:
+            for replica in replicas.replica_set.replicas:
+                replica.engine.sync_engine.dispose(close=False)
+            replicas.replica_set = None
+
+    # The engine and asyncpg driver load on first use
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    url = database_url()  # loads .env before the pool settings are read
+    settings = pool_settings()
+    settings.update(pool_kwargs)
+    engine = create_async_engine(url, pool_pre_ping=True, echo=False, **statements.engine_settings(url), **settings)
+    statements.execution_stats.instrument(engine)
+    statements.statement_cache.max_entries = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "512"))
+    AsyncSessionFactory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    routing = replica_settings()
+    if routing["urls"]:
+        replicas.replica_set = replicas.ReplicaSet(
+            engine_factory=lambda replica_url: statements.execution_stats.instrument(create_async_engine(
+                replica_url, pool_pre_ping=True, echo=False, **statements.engine_settings(replica_url), **settings
+            )),
+            session_factory=lambda replica_engine: async_sessionmaker(
+                bind=replica_engine, expire_on_commit=False
+            ),
+            **routing,
+        )
+
+    _engine_pid = pid
+    return engine
+
+
+async def dispose_engine():
+    """
+    Close the pooled connections of the current process.
+    """
+    global engine, AsyncSessionFactory, _engine_pid
+
+    if engine is None:
+        return
+    await engine.dispose()
+    if replicas.replica_set is not None:
+        await replicas.replica_set.dispose()
+        replicas.replica_set = None
+    engine = None
+    AsyncSessionFactory = None
+    _engine_pid = None
 
 
 # ------------------------------
 # Async session context manager
 # ------------------------------
 @asynccontextmanager
-async def get_async_session():
-    async with AsyncSessionFactory() as session:
+async def get_async_session(readonly: Optional[bool] = None):
+    """
+    Session for one unit of work, committed when the block exits.
+
+    :param readonly: Read from a replica when one is configured and usable;
+                     defaults to True inside GET requests. Reads after a
+                     write of the same request or client use the primary.
+    """
+    shared = _shared_session.get()
+    if shared is not None:
+        # Reuse the read-only session bound by shared_session()
+        yield shared
+        return
+
+    if _engine_pid != os.getpid():
+        init_engine()
+
+    context = ApiContext.current()
+    if readonly is None:
+        readonly = context is not None and context.apimethod in READ_METHODS
+    replica = replicas.route(context) if readonly else None
+
+    if context is not None:
+        # One lazily opened session per request and kind, closed by ApiContext.release()
+        if replica is not None:
+            if context.replica_session is None:
+                context.replica_session = replica.session_factory()
+            session = context.replica_session
+        else:
+            if context.session is None:
+                context.session = AsyncSessionFactory()
+            session = context.session
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        return
+
+    factory = replica.session_factory if replica is not None else AsyncSessionFactory
+    async with factory() as session:
         try:
             yield session
             await session.commit()
@@ -42,13 +197,43 @@ async def get_async_session():
             await session.close()
 
 
+@asynccontextmanager
+async def shared_session():
+    """
+    Bind one read-only session to the current context.
+    get_async_session() calls inside the scope reuse it instead of
+    checking out another pooled connection. Callers must not use it
+    concurrently. Served by a read replica when one is usable.
+    """
+    if _engine_pid != os.getpid():
+        init_engine()
+
+    replica = replicas.route(ApiContext.current())
+    factory = replica.session_factory if replica is not None else AsyncSessionFactory
+    async with factory() as session:
+        token = _shared_session.set(session)
+        try:
+            yield session
+        finally:
+            _shared_session.reset(token)
+            await session.rollback()
+            await session.close()
+
+
 # ------------------------------
 # Query Builder
 # ------------------------------
 class Query:
-    def __init__(self, session: AsyncSession, stmt: sa.sql.Select):
+    def __init__(self, session: AsyncSession, stmt: sa.sql.Select, params: Optional[Dict[str, Any]] = None):
+        """
+        :param stmt: Statement, possibly prebuilt by database.statements.cached_statement()
+        :param params: Values of its bindparam() placeholders
+        """
         self.session = session
         self.stmt = stmt
+        self._params: Dict[str, Any] = dict(params or {})
+        self._limit: Optional[int] = None
+        self._offset: int = 0
 
     def where(self, condition: Any):
         self.stmt = self.stmt.where(condition)
@@ -60,6 +245,13 @@ class Query:
                 self.stmt = self.stmt.where(c)
         return self
 
+    def params(self, **values):
+        """
+        Bind values at execution time instead of rebuilding the statement.
+        """
+        self._params.update(values)
+        return self
+
     def order_by_with(self, table, sortby: Optional[str], descending: bool = False):
         if sortby:
             column = getattr(table, sortby, None)
@@ -69,35 +261,87 @@ class Query:
         return self
 
     def limit(self, value: int):
+        self._limit = value
         self.stmt = self.stmt.limit(value)
         return self
 
     def offset(self, value: int):
+        self._offset = value
         self.stmt = self.stmt.offset(value)
         return self
 
+    def keyset(self, paginator, cursor: Optional[str], pagesize: int):
+        """
+        Seek to the page after / before cursor instead of using OFFSET.
+        Pass the fetched rows through paginator.page().
+        """
+        self.stmt = paginator.apply(self.stmt, cursor, pagesize)
+        return self
+
     async def fetch(self) -> List[Any]:
-        result = await self.session.execute(self.stmt)
+        result = await self.session.execute(self.stmt, self._params or None)
         return result.scalars().all()
 
     async def fetchrow(self) -> Any:
-        result = await self.session.execute(self.stmt)
+        result = await self.session.execute(self.stmt, self._params or None)
         return result.scalars().first()
 
-    async def fetchpages(self) -> Tuple[List[Any], int]:
-        count_stmt = sa.select(sa.func.count()).select_from(self.stmt.subquery())
-        total = await self.session.scalar(count_stmt)
-        result = await self.session.execute(self.stmt)
-        return result.scalars().all(), total
+    async def fetchdicts(self) -> List[Dict[str, Any]]:
+        """
+        Rows of a column projection as dicts, see database.projection.
+        """
+        return await fetch_dicts(self.session, self.stmt, self._params or None)
+
+    async def fetchpage(self, count: str = "exact", as_dicts: bool = False) -> Page:
+        """
+        Fetch the page with its total, see database.counting for the strategies.
+        """
+        return await fetch_page(
+            self.session, self.stmt, self._limit, self._offset, count, self._params or None, as_dicts,
+        )
+
+    async def fetchpages(self, count: str = "exact", as_dicts: bool = False) -> Tuple[List[Any], Optional[int]]:
+        page = await self.fetchpage(count, as_dicts)
+        return page.data, page.total
+
+
+# ------------------------------
+# Version token
+# ------------------------------
+async def fetch_version(
+    session: AsyncSession,
+    table,
+    criterions: Optional[List[Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    key: Optional[Hashable] = None,
+) -> Tuple[Any, int]:
+    """
+    max(updated_at) and row count of the matching rows of an AuditMixin table.
+    Changes whenever a matching row is inserted, updated or (soft) deleted,
+    without materializing any row.
+
+    :param key: Shape key; the statement is built once and reused, with
+                criterions using bindparam() placeholders filled from params
+    """
+    def build():
+        stmt = sa.select(sa.func.max(table.updated_at), sa.func.count()).select_from(table)
+        if criterions:
+            stmt = stmt.where(*criterions)
+        return stmt
+
+    stmt = statements.cached_statement(key, build) if key is not None else build()
+    row = (await session.execute(stmt, params)).one()
+    return row[0], row[1]
 
 
 # ------------------------------
 # Write Operations
 # ------------------------------
 class WriteQuery:
-    def __init__(self, session: AsyncSession, stmt):
+    def __init__(self, session: AsyncSession, stmt, params: Optional[Dict[str, Any]] = None):
         self.session = session
         self.stmt = stmt
+        self._params: Dict[str, Any] = dict(params or {})
 
     def where(self, condition: Any):
         self.stmt = self.stmt.where(condition)
@@ -107,7 +351,92 @@ class WriteQuery:
         self.stmt = self.stmt.values(**values)
         return self
 
+    def params(self, **values):
+        self._params.update(values)
+        return self
+
     async def execute(self):
-        await self.session.execute(self.stmt)
+        await self.session.execute(self.stmt, self._params or None)
         await self.session.commit()
         return True
+
+
+# ------------------------------
+# Scoped session
+# ------------------------------
+class ScopedQuery(Query):
+    """
+    Query that takes its session from get_async_session() when it runs.
+    """
+
+    async def _run(self, method, *args):
+        async with get_async_session() as session:
+            self.session = session
+            try:
+                return await method(*args)
+            finally:
+                self.session = None
+
+    async def fetch(self) -> List[Any]:
+        return await self._run(super().fetch)
+
+    async def fetchrow(self) -> Any:
+        return await self._run(super().fetchrow)
+
+    async def fetchdicts(self) -> List[Dict[str, Any]]:
+        return await self._run(super().fetchdicts)
+
+    async def fetchpage(self, count: str = "exact", as_dicts: bool = False) -> Page:
+        return await self._run(super().fetchpage, count, as_dicts)
+
+
+class ScopedWriteQuery(WriteQuery):
+    """
+    WriteQuery that runs in a get_async_session(readonly=False) unit of work.
+    """
+
+    async def execute(self):
+        async with get_async_session(readonly=False) as session:
+            self.session = session
+            try:
+                return await super().execute()
+            finally:
+                self.session = None
+
+
+class ScopeSession:
+    """
+    Chainable statements that open their session when they run: the
+    request session inside an API call, a short-lived one otherwise.
+    Reads are routed like get_async_session(), writes go to the primary.
+
+        user = await scope_session.select(Users).where(Users.id == user_id).fetchrow()
+        await scope_session.update(Users).where(Users.id == user_id).values(name=name).execute()
+    """
+
+    def select(self, *entities) -> ScopedQuery:
+        return ScopedQuery(None, sa.select(*entities))
+
+    async def add(self, table, conflict_nothing: Optional[Union[str, List[str]]] = None, **values):
+        """
+        Insert one row and return it as an ORM instance.
+
+        :param conflict_nothing: Unique column(s); a conflicting row is
+                                 skipped and None returned
+        """
+        stmt = pg_insert(table).values(**values)
+        if conflict_nothing:
+            columns = [conflict_nothing] if isinstance(conflict_nothing, str) else list(conflict_nothing)
+            stmt = stmt.on_conflict_do_nothing(index_elements=columns)
+        stmt = stmt.returning(table)
+        async with get_async_session(readonly=False) as session:
+            return (await session.execute(stmt)).scalars().first()
+
+    def update(self, table) -> ScopedWriteQuery:
+        return ScopedWriteQuery(None, sa.update(table))
+
+    def delete(self, table) -> ScopedWriteQuery:
+        return ScopedWriteQuery(None, sa.delete(table))
+
+
+scope_session = ScopeSession()
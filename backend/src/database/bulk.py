@@ -0,0 +1,309 @@
+"""
+Bulk writes for OpsPilot
+------------------------
+Set-based insert / update / delete with per-row results.
+
+- insert_rows   multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING
+- copy_rows     asyncpg COPY (copy_records_to_table), all or nothing
+- update_rows   UPDATE ... FROM (VALUES ...) RETURNING
+- delete_rows   (soft) DELETE ... WHERE id IN (...) RETURNING
+
+Rows are sent in chunks bounded by CHUNK_SIZE and the bind parameter
+limit of the driver. When a chunk fails as a whole (e.g. a value too
+long for its column), it is retried row by row inside savepoints so
+each row gets its own error instead of failing the batch.
+
+Results are one dict per input row, in input order:
+    {"index": 0, "id": 7}  or  {"index": 1, "code": ..., "error": "..."}
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from core.const.secrets import CODES
+from database.counting import note_written
+from database.replicas import note_write
+
+# Rows per statement
+CHUNK_SIZE = 1000
+
+# asyncpg accepts at most 32767 bind parameters per statement
+MAX_PARAMS = 32000
+
+
+def ok(index: int, **values) -> Dict[str, Any]:
+    return {"index": index, **values}
+
+
+def error(index: int, code: Any, message: str) -> Dict[str, Any]:
+    return {"index": index, "code": code, "error": message}
+
+
+def _chunks(items: Sequence[Any], width: int) -> Iterable[Sequence[Any]]:
+    size = max(1, min(CHUNK_SIZE, MAX_PARAMS // max(width, 1)))
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _group_by_keys(rows: Sequence[Dict[str, Any]]) -> Dict[Tuple[str, ...], List[int]]:
+    """
+    Row indexes by column set; one statement needs the same columns in every row.
+    """
+    groups: Dict[Tuple[str, ...], List[int]] = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(tuple(sorted(row)), []).append(index)
+    return groups
+
+
+def _db_message(e: Exception) -> str:
+    # The driver exception carries the plain server message
+    orig = getattr(e, "orig", None)
+    error_ = getattr(orig, "__cause__", None) or orig or e
+    return str(error_).strip().splitlines()[0]
+
+
+def _primary_key(table: sa.Table) -> sa.Column:
+    columns = list(table.primary_key.columns)
+    if len(columns) != 1:
+        raise ValueError(f"Bulk writes need a single-column primary key: {table.fullname}")
+    return columns[0]
+
+
+async def _row_by_row(session, indexes: Sequence[int], run_one) -> Dict[int, Dict[str, Any]]:
+    """
+    Retry a failed chunk one row at a time, each in its own savepoint.
+    """
+    results = {}
+    for index in indexes:
+        try:
+            async with session.begin_nested():
+                results[index] = await run_one(index)
+        except IntegrityError as e:
+            results[index] = error(index, CODES.DATABASE_UNIQUE_VIOLATION_ERROR, _db_message(e))
+        except DBAPIError as e:
+            results[index] = error(index, CODES.PARAMETER_INVALID, _db_message(e))
+    return results
+
+
+# ------------------------------
+# Insert
+# ------------------------------
+async def insert_rows(
+    session,
+    table: sa.Table,
+    rows: Sequence[Dict[str, Any]],
+    conflict: Optional[Sequence[str]] = None,
+    conflict_code: Any = CODES.DATABASE_UNIQUE_VIOLATION_ERROR,
+) -> List[Dict[str, Any]]:
+    """
+    Insert rows with multi-row INSERT statements.
+
+    :param conflict: Unique columns; conflicting rows (also duplicates
+                     within rows) are skipped and reported with conflict_code
+    :return: Per-row results carrying the primary key of inserted rows
+    """
+    pk = _primary_key(table)
+    conflict = tuple(conflict or ())
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+
+    # Later duplicates of a conflict key never reach the database
+    pending = []
+    seen = set()
+    for index, row in enumerate(rows):
+        if conflict:
+            key = tuple(row.get(c) for c in conflict)
+            if key in seen:
+                results[index] = error(index, conflict_code, f"Duplicate {', '.join(conflict)} in request")
+                continue
+            seen.add(key)
+        pending.append(index)
+
+    returning = [pk, *(table.c[c] for c in conflict)]
+
+    def statement(chunk_rows):
+        stmt = pg_insert(table).values(chunk_rows)
+        if conflict:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict))
+        return stmt.returning(*returning)
+
+    def collect(indexes, returned):
+        if not conflict:
+            # No row is skipped, RETURNING follows the VALUES order
+            for index, row in zip(indexes, returned):
+                results[index] = ok(index, id=row[0])
+            return
+        inserted = {tuple(row[1:]): row[0] for row in returned}
+        for index in indexes:
+            key = tuple(rows[index].get(c) for c in conflict)
+            if key in inserted:
+                results[index] = ok(index, id=inserted[key])
+            else:
+                results[index] = error(index, conflict_code, f"{', '.join(conflict)} already exists")
+
+    by_keys = _group_by_keys([rows[i] for i in pending])
+    for keys, positions in by_keys.items():
+        indexes = [pending[p] for p in positions]
+        for chunk in _chunks(indexes, len(keys)):
+            try:
+                async with session.begin_nested():
+                    returned = (await session.execute(statement([rows[i] for i in chunk]))).all()
+                collect(chunk, returned)
+            except DBAPIError:
+                async def insert_one(index):
+                    returned = (await session.execute(statement([rows[index]]))).all()
+                    collect([index], returned)
+                    return results[index]
+                results_by_index = await _row_by_row(session, chunk, insert_one)
+                for index, result in results_by_index.items():
+                    results[index] = result
+
+    return results
+
+
+async def copy_rows(session, table: sa.Table, rows: Sequence[Dict[str, Any]]) -> int:
+    """
+    Load rows with COPY through the asyncpg connection of the session.
+    Fastest path, but all or nothing and without conflict handling.
+    Columns missing from every row get their server default.
+
+    :return: Number of rows copied
+    """
+    if not rows:
+        return 0
+
+    columns = sorted({key for row in rows for key in row})
+    # Python-side scalar defaults are not applied by COPY
+    defaults = {
+        column.name: column.default.arg
+        for column in table.columns
+        if column.default is not None and column.default.is_scalar and column.name not in columns
+    }
+    columns += sorted(defaults)
+
+    records = [
+        tuple(row.get(c, defaults.get(c)) for c in columns)
+        for row in rows
+    ]
+
+    # COPY bypasses the ORM events that pin later reads to the primary
+    # and drop cached counts of the table
+    note_write()
+    note_written(session, {table.fullname})
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        table.name, records=records, columns=columns, schema_name=table.schema,
+    )
+    return len(records)
+
+
+# ------------------------------
+# Update
+# ------------------------------
+async def update_rows(
+    session,
+    table: sa.Table,
+    rows: Sequence[Dict[str, Any]],
+    criterions: Sequence[Any] = (),
+    values: Optional[Dict[str, Any]] = None,
+    missing_code: Any = CODES.RECORD_NOT_EXITS,
+) -> List[Dict[str, Any]]:
+    """
+    Update rows by primary key with UPDATE ... FROM (VALUES ...).
+
+    :param rows: Dicts with the primary key and the columns to set
+    :param criterions: Extra conditions, e.g. table.c.is_deleted == False
+    :param values: Values set on every updated row, e.g. updated_at
+    :return: Per-row results; rows not matched are reported with missing_code
+    """
+    pk = _primary_key(table)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+
+    for index, row in enumerate(rows):
+        if row.get(pk.name) is None:
+            results[index] = error(index, missing_code, f"Missing {pk.name}")
+
+    def statement(keys, chunk_rows):
+        columns = [c for c in keys if c != pk.name]
+        source = sa.values(
+            *(sa.column(c, table.c[c].type) for c in keys), name="bulk_values"
+        ).data([tuple(r[c] for c in keys) for r in chunk_rows])
+        assignments = {c: source.c[c] for c in columns}
+        assignments.update(values or {})
+        return (
+            sa.update(table)
+            .where(table.c[pk.name] == source.c[pk.name], *criterions)
+            .values(assignments)
+            .returning(table.c[pk.name])
+        )
+
+    def collect(indexes, returned):
+        updated = {row[0] for row in returned}
+        for index in indexes:
+            row_id = rows[index][pk.name]
+            if row_id in updated:
+                results[index] = ok(index, id=row_id)
+            else:
+                results[index] = error(index, missing_code, f"Record {row_id} does not exist")
+
+    pending = [i for i, result in enumerate(results) if result is None]
+    for keys, positions in _group_by_keys([rows[i] for i in pending]).items():
+        indexes = [pending[p] for p in positions]
+        if keys == (pk.name,) and not values:
+            for index in indexes:
+                results[index] = error(index, CODES.PARAMETER_MISSING, "Nothing to update")
+            continue
+        for chunk in _chunks(indexes, len(keys)):
+            try:
+                async with session.begin_nested():
+                    returned = (await session.execute(statement(keys, [rows[i] for i in chunk]))).all()
+                collect(chunk, returned)
+            except DBAPIError:
+                async def update_one(index, keys=keys):
+                    returned = (await session.execute(statement(keys, [rows[index]]))).all()
+                    collect([index], returned)
+                    return results[index]
+                for index, result in (await _row_by_row(session, chunk, update_one)).items():
+                    results[index] = result
+
+    return results
+
+
+# ------------------------------
+# Delete
+# ------------------------------
+async def delete_rows(
+    session,
+    table: sa.Table,
+    ids: Sequence[Any],
+    soft: bool = True,
+    values: Optional[Dict[str, Any]] = None,
+    missing_code: Any = CODES.RECORD_NOT_EXITS,
+) -> List[Dict[str, Any]]:
+    """
+    Delete rows by primary key; soft deletion sets is_deleted on live rows.
+
+    :return: Per-id results; ids not matched are reported with missing_code
+    """
+    pk = _primary_key(table)
+    deleted = set()
+    for chunk in _chunks(list(dict.fromkeys(ids)), 1):
+        if soft:
+            stmt = (
+                sa.update(table)
+                .where(pk.in_(chunk), table.c.is_deleted == False)
+                .values(is_deleted=True, **(values or {}))
+            )
+        else:
+            stmt = sa.delete(table).where(pk.in_(chunk))
+        returned = await session.execute(stmt.returning(pk))
+        deleted.update(row[0] for row in returned)
+
+    return [
+        ok(index, id=row_id) if row_id in deleted
+        else error(index, missing_code, f"Record {row_id} does not exist")
+        for index, row_id in enumerate(ids)
+    ]
@@ -0,0 +1,306 @@
+"""
+Total-count strategies for OpsPilot
+-----------------------------------
+How the total of a paginated query is obtained, selectable per call:
+
+- exact     count(*) OVER() on the page query itself, one round trip
+- estimate  planner estimate (pg_class.reltuples, or EXPLAIN for filtered
+            queries); small estimates are replaced by an exact count
+- cached    exact count kept per query shape and parameters, dropped when
+            a session commits writes to one of its tables
+- none      no total; one extra row is fetched for has_more
+
+    page = await fetch_page(session, stmt, limit=10, offset=20, count="estimate")
+    page.data, page.total, page.has_more, page.estimated
+
+params are the execution parameters of statements with bindparam()
+placeholders (see database.statements). as_dicts=True returns the rows
+of a column projection as dicts (see database.projection) instead of
+the first entity of each row.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from sqlalchemy.sql.util import find_tables
+
+from core.exceptions import ParamError
+from database.projection import rows_to_dicts
+
+COUNT_STRATEGIES = ("exact", "estimate", "cached", "none")
+
+# Estimates below this are replaced by an exact count
+EXACT_BELOW = 10000
+
+# Cached counts
+CACHE_TTL = 60.0
+CACHE_MAX_ENTRIES = 1024
+
+_TOTAL = "__total__"
+
+
+class Page(NamedTuple):
+    data: List[Any]
+    total: Optional[int]
+    has_more: bool
+    estimated: bool = False
+
+
+def check_strategy(count: str) -> str:
+    if count not in COUNT_STRATEGIES:
+        raise ParamError(f"Invalid count strategy: {count}, expected one of {', '.join(COUNT_STRATEGIES)}")
+    return count
+
+
+def _base(stmt):
+    """
+    The statement without ordering and paging.
+    """
+    return stmt.limit(None).offset(None).order_by(None)
+
+
+def _tables(stmt) -> FrozenSet[str]:
+    return frozenset(t.fullname for t in find_tables(stmt, include_crud=True) if hasattr(t, "fullname"))
+
+
+# ------------------------------
+# Exact
+# ------------------------------
+async def exact_count(session, stmt, params: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Separate count(*) over the statement, ignoring its paging.
+    """
+    base = _base(stmt)
+    return await session.scalar(sa.select(sa.func.count()).select_from(base.subquery()), params)
+
+
+async def _fetch_window(
+    session, stmt, limit: int, offset: int, params: Optional[Dict[str, Any]] = None, as_dicts: bool = False,
+) -> Page:
+    paged = stmt.add_columns(sa.func.count().over().label(_TOTAL)).limit(limit).offset(offset)
+    result = await session.execute(paged, params)
+    keys = list(result.keys())[:-1]
+    rows = result.all()
+    if rows:
+        total = rows[0][-1]
+    elif offset:
+        # Past the last page no row carries the window total
+        total = await exact_count(session, stmt, params)
+    else:
+        total = 0
+    data = rows_to_dicts(keys, rows) if as_dicts else [row[0] for row in rows]
+    return Page(data, total, offset + len(rows) < total)
+
+
+# ------------------------------
+# Estimate
+# ------------------------------
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def estimate_count(session, stmt, params: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Planner row estimate of the statement, without running it.
+    Unfiltered single-table queries read pg_class.reltuples directly.
+    """
+    base = _base(stmt)
+    froms = base.get_final_froms()
+    if base.whereclause is None and len(froms) == 1 and isinstance(froms[0], sa.Table):
+        reltuples = await session.scalar(
+            sa.text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+            {"name": froms[0].fullname},
+        )
+        # -1 until the table is vacuumed or analyzed for the first time
+        if reltuples is not None and reltuples >= 0:
+            return int(reltuples)
+
+    plan = await session.scalar(_Explain(base), params)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# ------------------------------
+# Cached exact count
+# ------------------------------
+class CountCache:
+    """
+    Exact counts by query shape and parameters, LRU with a TTL and
+    dropped per table when a session commits writes to that table.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, int, FrozenSet[str]]]" = OrderedDict()
+        self._by_table: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(stmt, params: Optional[Dict[str, Any]] = None) -> str:
+        compiled = _base(stmt).compile()
+        values = {**compiled.params, **(params or {})}
+        return f"{compiled}\n{sorted(values.items(), key=lambda kv: kv[0])!r}"
+
+    def get(self, key: str) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, total: int, tables: FrozenSet[str]):
+        self._entries[key] = (time.monotonic() + self.ttl, total, tables)
+        self._entries.move_to_end(key)
+        for table in tables:
+            self._by_table.setdefault(table, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for table in entry[2]:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate(self, tables):
+        for table in tables:
+            for key in list(self._by_table.get(table, ())):
+                self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_table.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+count_cache = CountCache()
+
+
+async def cached_count(session, stmt, params: Optional[Dict[str, Any]] = None) -> int:
+    key = CountCache.make_key(stmt, params)
+    total = count_cache.get(key)
+    if total is None:
+        total = await exact_count(session, stmt, params)
+        count_cache.set(key, total, _tables(stmt))
+    return total
+
+
+# Writes are collected per session and dropped again on commit, so a
+# count cached by a concurrent reader before the commit does not survive
+_WRITTEN = "opspilot_written_tables"
+
+
+def _note_written(session: Session, tables):
+    if tables:
+        session.info.setdefault(_WRITTEN, set()).update(tables)
+        count_cache.invalidate(tables)
+
+
+def note_written(session, tables):
+    """
+    Record writes that bypass the ORM events (e.g. COPY): cached counts
+    of those tables are dropped now and again when the session commits.
+    """
+    _note_written(getattr(session, "sync_session", session), set(tables))
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    tables = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        table = getattr(obj, "__table__", None)
+        if table is not None:
+            tables.add(table.fullname)
+    _note_written(session, tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _note_written(orm_execute_state.session, _tables(orm_execute_state.statement))
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    tables = session.info.pop(_WRITTEN, None)
+    if tables:
+        count_cache.invalidate(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(_WRITTEN, None)
+
+
+# ------------------------------
+# Page fetch
+# ------------------------------
+async def count_rows(
+    session, stmt, count: str = "exact", params: Optional[Dict[str, Any]] = None,
+) -> Tuple[Optional[int], bool]:
+    """
+    Total of stmt (paging ignored) with a separate query.
+
+    :return: (total, estimated)
+    """
+    check_strategy(count)
+    if count == "none":
+        return None, False
+    if count == "cached":
+        return await cached_count(session, stmt, params), False
+    if count == "estimate":
+        total = await estimate_count(session, stmt, params)
+        if total >= EXACT_BELOW:
+            return total, True
+    return await exact_count(session, stmt, params), False
+
+
+async def fetch_page(
+    session, stmt, limit: Optional[int], offset: int = 0, count: str = "exact",
+    params: Optional[Dict[str, Any]] = None, as_dicts: bool = False,
+) -> Page:
+    """
+    Fetch one page of stmt with its total; the paging of stmt itself is replaced.
+    """
+    check_strategy(count)
+    stmt = stmt.limit(None).offset(None)
+    if count == "exact":
+        return await _fetch_window(session, stmt, limit, offset, params, as_dicts)
+
+    result = await session.execute(stmt.limit(None if limit is None else limit + 1).offset(offset), params)
+    rows = rows_to_dicts(list(result.keys()), result.all()) if as_dicts else result.scalars().all()
+    has_more = limit is not None and len(rows) > limit
+    data = rows[:limit]
+
+    total, estimated = await count_rows(session, stmt, count, params)
+    if total is not None and not estimated:
+        # Keep the total consistent with what was just read
+        total = max(total, offset + len(data))
+    return Page(data, total, has_more, estimated)
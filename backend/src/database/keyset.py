@@ -0,0 +1,214 @@
+"""
+Keyset (cursor) pagination for OpsPilot
+---------------------------------------
+Seek pagination over (sort column, id) instead of LIMIT/OFFSET, so the
+cost of a page does not grow with its depth.
+
+Rows are ordered by the sort column (NULLs last) with the primary key
+as a tiebreaker in the same direction. A cursor is an opaque token of
+the first or last row's (sort value, id) and the direction to seek:
+
+    paginator = KeysetPaginator(Users, "age", descending=True, sortable=SORTABLE)
+    stmt = paginator.apply(select(Users), cursor, pagesize)
+    rows = (await session.execute(stmt)).scalars().all()
+    rows, next_cursor, prev_cursor = paginator.page(rows, cursor, pagesize)
+
+A composite index on (sort column, id) lets every page be an index seek.
+"""
+
+import base64
+import json
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import sqlalchemy as sa
+
+from core.exceptions import ParamError
+
+# Cursor format version, bumped when the encoding changes
+CURSOR_VERSION = 1
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _from_json(value: Any, python_type: Optional[type]) -> Any:
+    if value is None or python_type is None:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if python_type is time:
+        return time.fromisoformat(value)
+    if python_type in (Decimal, uuid.UUID):
+        return python_type(value)
+    return value
+
+
+def _python_type(column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+class KeysetPaginator:
+    """
+    Keyset pagination of one table, sort column and direction.
+    """
+
+    def __init__(
+        self,
+        table,
+        sortby: str = "id",
+        descending: bool = False,
+        sortable: Optional[Iterable[str]] = None,
+    ):
+        """
+        :param table: ORM model
+        :param sortby: Sort column name
+        :param descending: Sort direction
+        :param sortable: Whitelist of sort columns, defaults to the table columns
+        """
+        columns = table.__table__.columns
+        allowed = set(sortable) if sortable is not None else set(columns.keys())
+        if sortby not in allowed or sortby not in columns:
+            raise ParamError(f"Invalid sort column: {sortby}")
+
+        primary_key = list(table.__table__.primary_key.columns)
+        if len(primary_key) != 1:
+            raise ValueError(f"Keyset pagination needs a single-column primary key: {table.__tablename__}")
+
+        self.sortby = sortby
+        self.descending = bool(descending)
+        self.id_name = primary_key[0].key
+        self.column = getattr(table, sortby)
+        self.id_column = getattr(table, self.id_name)
+        self.nullable = sortby != self.id_name and columns[sortby].nullable
+        self._value_type = _python_type(columns[sortby])
+        self._id_type = _python_type(primary_key[0])
+
+    # ------------------------------
+    # Cursor encoding
+    # ------------------------------
+    def encode(self, row: Any, backward: bool = False) -> str:
+        """
+        Cursor pointing at row; backward cursors seek the rows before it.
+        """
+        payload = [
+            CURSOR_VERSION,
+            self.sortby,
+            int(self.descending),
+            int(backward),
+            _to_json(getattr(row, self.sortby)),
+            _to_json(getattr(row, self.id_name)),
+        ]
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    def decode(self, cursor: str) -> Tuple[Any, Any, bool]:
+        """
+        :return: (sort value, id, backward)
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            version, sortby, descending, backward, value, row_id = json.loads(raw)
+        except (ValueError, TypeError):
+            raise ParamError("Invalid cursor")
+
+        if version != CURSOR_VERSION:
+            raise ParamError("Cursor has expired, restart from the first page")
+        if sortby != self.sortby or bool(descending) != self.descending:
+            raise ParamError("Cursor does not match the sort order")
+        if row_id is None:
+            raise ParamError("Invalid cursor")
+
+        try:
+            value = _from_json(value, self._value_type)
+            row_id = _from_json(row_id, self._id_type)
+        except (ValueError, TypeError):
+            raise ParamError("Invalid cursor")
+        return value, row_id, bool(backward)
+
+    # ------------------------------
+    # Statement
+    # ------------------------------
+    def _order_by(self, backward: bool) -> List[Any]:
+        # Backward pages are read in reverse order, then flipped by page()
+        descending = self.descending != backward
+        id_order = self.id_column.desc() if descending else self.id_column.asc()
+        if self.column is self.id_column:
+            return [id_order]
+
+        order = self.column.desc() if descending else self.column.asc()
+        if self.nullable:
+            order = order.nulls_first() if backward else order.nulls_last()
+        return [order, id_order]
+
+    def _seek(self, value: Any, row_id: Any, backward: bool):
+        descending = self.descending != backward
+
+        def beyond(column, bound):
+            return column < bound if descending else column > bound
+
+        if self.column is self.id_column:
+            return beyond(self.id_column, row_id)
+
+        if not self.nullable:
+            # Row value comparison, served by an index on (column, id)
+            return beyond(sa.tuple_(self.column, self.id_column), sa.tuple_(value, row_id))
+
+        # NULLs sort last going forward, first going backward
+        if value is None:
+            if backward:
+                return sa.or_(self.column.isnot(None), beyond(self.id_column, row_id))
+            return sa.and_(self.column.is_(None), beyond(self.id_column, row_id))
+
+        after = sa.or_(
+            beyond(self.column, value),
+            sa.and_(self.column == value, beyond(self.id_column, row_id)),
+        )
+        if backward:
+            return sa.and_(self.column.isnot(None), after)
+        return sa.or_(after, self.column.is_(None))
+
+    def apply(self, stmt, cursor: Optional[str], pagesize: int):
+        """
+        Add the seek condition, ordering and limit to a select statement.
+        One extra row is fetched to detect whether more rows follow.
+        """
+        backward = False
+        if cursor:
+            value, row_id, backward = self.decode(cursor)
+            stmt = stmt.where(self._seek(value, row_id, backward))
+        return stmt.order_by(*self._order_by(backward)).limit(pagesize + 1)
+
+    def page(self, rows: Sequence[Any], cursor: Optional[str], pagesize: int) -> Tuple[List[Any], Optional[str], Optional[str]]:
+        """
+        Trim the extra row and build the neighbour cursors.
+
+        :return: (rows, next cursor, prev cursor)
+        """
+        backward = bool(cursor) and self.decode(cursor)[2]
+        rows = list(rows)
+        has_more = len(rows) > pagesize
+        rows = rows[:pagesize]
+        if backward:
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+
+        has_next = has_more if not backward else True
+        has_prev = bool(cursor) if not backward else has_more
+        next_cursor = self.encode(rows[-1]) if has_next else None
+        prev_cursor = self.encode(rows[0], backward=True) if has_prev else None
+        return rows, next_cursor, prev_cursor
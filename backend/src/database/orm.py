@@ -3,18 +3,124 @@ SQLAlchemy ORM base for OpsPilot
 --------------------------------
 Defines declarative base with default schema 'opspilot'.
 Includes mixins for audit, remark, and soft delete.
+
+Models serialize through a Serializer generated once per mapped class:
+its column list, minus __exclude__, with the __converters__ of the
+model and its mixins applied to non-null values.
+
+    class Users(ModelBase, AuditMixin):
+        __exclude__ = ('password',)
+        __converters__ = {'created_by_id': str}
+
+    user.to_dict()
+    Users.serialize_many(users)  # ORM instances or Core rows
 """
 
+from operator import attrgetter, itemgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List
+
 import sqlalchemy as sa
 from sqlalchemy import Column, MetaData
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import declarative_base, declared_attr
 from sqlalchemy.dialects.postgresql import UUID
 
+
+# ------------------------------
+# Serialization
+# ------------------------------
+def excluded_columns(model) -> FrozenSet[str]:
+    """
+    __exclude__ of the model and every class it inherits from.
+    """
+    hidden = set()
+    for klass in model.__mro__:
+        hidden.update(vars(klass).get('__exclude__', ()))
+    return frozenset(hidden)
+
+
+def column_converters(model) -> Dict[str, Callable[[Any], Any]]:
+    """
+    __converters__ of the mixins, overridden by those of the model.
+    """
+    converters = {}
+    for klass in reversed(model.__mro__):
+        converters.update(vars(klass).get('__converters__', {}))
+    return converters
+
+
+class Serializer:
+    """
+    Column list and converters of one mapped class, read once from its mapper.
+    """
+    __slots__ = ('keys', 'converters', '_items', '_attrs')
+
+    def __init__(self, model):
+        hidden = excluded_columns(model)
+        converters = column_converters(model)
+        self.keys = tuple(attr.key for attr in sa.inspect(model).column_attrs if attr.key not in hidden)
+        self.converters = tuple((key, converters[key]) for key in self.keys if key in converters)
+        items, attrs = itemgetter(*self.keys), attrgetter(*self.keys)
+        if len(self.keys) == 1:
+            self._items, self._attrs = (lambda obj: (items(obj),)), (lambda obj: (attrs(obj),))
+        else:
+            self._items, self._attrs = items, attrs
+
+    def _values(self, obj):
+        if isinstance(obj, Row):
+            return self._items(obj._mapping)
+        try:
+            # Loaded column values sit in the instance dict
+            return self._items(obj.__dict__)
+        except KeyError:
+            # Expired or deferred attributes load through the mapper
+            return self._attrs(obj)
+
+    def __call__(self, obj) -> Dict[str, Any]:
+        data = dict(zip(self.keys, self._values(obj)))
+        for key, convert in self.converters:
+            value = data[key]
+            if value is not None:
+                data[key] = convert(value)
+        return data
+
+    def many(self, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        if self.converters:
+            return [self(obj) for obj in objs]
+        keys, values = self.keys, self._values
+        return [dict(zip(keys, values(obj))) for obj in objs]
+
+
+class SerializableBase:
+    """
+    Serialization shared by every model.
+    """
+    __exclude__ = ()
+    __converters__ = {}
+
+    @classmethod
+    def serializer(cls) -> Serializer:
+        # Per class, never the serializer inherited from a mapped parent
+        serializer = cls.__dict__.get('_serializer')
+        if serializer is None:
+            serializer = Serializer(cls)
+            cls._serializer = serializer
+        return serializer
+
+    @classmethod
+    def serialize_many(cls, objs: Iterable[Any]) -> List[Dict[str, Any]]:
+        return cls.serializer().many(objs)
+
+    def to_dict(self) -> dict:
+        # date / datetime are encoded by core.utils.json_encoder
+        return self.serializer()(self)
+
+
 # ------------------------------
 # Base metadata
 # ------------------------------
 metadata = MetaData(schema='opspilot')
-ModelBase = declarative_base(metadata=metadata)
+ModelBase = declarative_base(metadata=metadata, cls=SerializableBase)
 
 # ------------------------------
 # Mixins
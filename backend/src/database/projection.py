@@ -0,0 +1,65 @@
+"""
+Column projections for OpsPilot
+-------------------------------
+Read-only list paths that select explicit table columns with SQLAlchemy
+Core and return plain dicts, without ORM instances, identity map or
+attribute instrumentation.
+
+Columns that responses must never carry are listed on the model and
+are left out of the SELECT itself:
+
+    class Users(ModelBase):
+        __exclude__ = ("password",)
+
+    stmt = sa.select(*public_columns(Users)).where(...)
+    rows = await fetch_dicts(session, stmt)
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import sqlalchemy as sa
+
+from core.exceptions import ParamError
+from database.orm import excluded_columns
+
+# Public columns by model, in table order
+_public: Dict[type, Tuple[sa.Column, ...]] = {}
+
+
+def public_columns(table, columns: Optional[Iterable[Union[str, Any]]] = None) -> Tuple[sa.Column, ...]:
+    """
+    Table columns of a model without its __exclude__ columns.
+
+    :param columns: Subset to select, as names or columns; excluded and
+                    unknown columns raise ParamError
+    """
+    if columns is None:
+        public = _public.get(table)
+        if public is None:
+            hidden = excluded_columns(table)
+            public = tuple(c for c in table.__table__.columns if c.key not in hidden)
+            _public[table] = public
+        return public
+
+    hidden = excluded_columns(table)
+    table_columns = table.__table__.columns
+    selected = []
+    for column in columns:
+        name = column if isinstance(column, str) else column.key
+        if name in hidden or name not in table_columns:
+            raise ParamError(f"Invalid column: {name}")
+        selected.append(table_columns[name])
+    return tuple(selected)
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[Dict[str, Any]]:
+    """
+    Rows as dicts keyed by column name; columns past the keys (e.g. a
+    window total) are dropped.
+    """
+    return [dict(zip(keys, row)) for row in rows]
+
+
+async def fetch_dicts(session, stmt, params: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    result = await session.execute(stmt, params)
+    return rows_to_dicts(list(result.keys()), result.all())
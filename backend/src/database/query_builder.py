@@ -1,10 +1,15 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.counting import fetch_page
+
 
 class QueryBuilder:
-    def __init__(self, session: AsyncSession, stmt):
+    def __init__(self, session: AsyncSession, stmt, params=None):
         self.session = session
         self.stmt = stmt
+        self._params = dict(params or {})
+        self._limit = None
+        self._offset = 0
 
     def where(self, condition, fn=None):
         if fn:
@@ -24,6 +29,11 @@ class QueryBuilder:
         self.stmt = self.stmt.values(**values)
         return self
 
+    def params(self, **values):
+        # Values of bindparam() placeholders, e.g. of a cached statement
+        self._params.update(values)
+        return self
+
     def order_by_with(self, table, sortby=None, descending=False):
         if sortby and hasattr(table, sortby):
             col = getattr(table, sortby)
@@ -31,27 +41,28 @@ class QueryBuilder:
         return self
 
     def limit(self, limit: int):
+        self._limit = limit
         self.stmt = self.stmt.limit(limit)
         return self
 
     def offset(self, offset: int):
+        self._offset = offset
         self.stmt = self.stmt.offset(offset)
         return self
 
     async def fetch(self):
-        result = await self.session.execute(self.stmt)
+        result = await self.session.execute(self.stmt, self._params or None)
         return result.scalars().all()
 
     async def fetchrow(self):
-        result = await self.session.execute(self.stmt)
+        result = await self.session.execute(self.stmt, self._params or None)
         return result.scalars().first()
 
-    async def fetchpages(self):
-        result = await self.session.execute(self.stmt)
-        data = result.scalars().all()
-        count = len(data)
-        return data, count
+    async def fetchpages(self, count="exact"):
+        # Total of all matching rows, not of the page (see database.counting)
+        page = await fetch_page(self.session, self.stmt, self._limit, self._offset, count, self._params or None)
+        return page.data, page.total
 
     async def execute(self):
-        await self.session.execute(self.stmt)
+        await self.session.execute(self.stmt, self._params or None)
         await self.session.flush()
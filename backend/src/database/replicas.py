@@ -0,0 +1,250 @@
+"""
+Read replicas for OpsPilot
+--------------------------
+Routing of read-only sessions to a set of replica engines.
+
+- Round-robin over replicas that are healthy and within max_lag seconds
+  of the primary; with none left, reads go to the primary
+- Health and lag are probed in the background, at most every
+  check_interval seconds per replica; failed replicas back off. A replica
+  takes no reads before its first successful probe
+- Read-your-writes: after a write, the same request and the same client
+  (user, else address) read from the primary for sticky_seconds; client
+  stickiness is kept per worker process
+
+Configured by database.aio_session.init_engine() from
+DATABASE_REPLICA_URLS (comma separated).
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import sqlalchemy as sa
+from sanic.log import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from core.api.api_context import ApiContext
+
+# Replay lag in seconds; 0 on a primary or when all received WAL is replayed
+LAG_SQL = sa.text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# Longest back-off between probes of a failed replica
+MAX_BACKOFF = 30.0
+
+
+class Replica:
+    __slots__ = ("name", "engine", "session_factory", "healthy", "lag", "failures", "next_check", "checking")
+
+    def __init__(self, name: str, engine, session_factory):
+        self.name = name
+        self.engine = engine
+        self.session_factory = session_factory
+        # Unused until the first probe succeeds
+        self.healthy = False
+        self.lag = 0.0
+        self.failures = 0
+        self.next_check = 0.0
+        self.checking = False
+
+
+class ReplicaSet:
+    """
+    Replica engines of one worker process.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        engine_factory: Callable[[str], Any],
+        session_factory: Callable[[Any], Any],
+        max_lag: float = 5.0,
+        check_interval: float = 2.0,
+        sticky_seconds: float = 5.0,
+        max_clients: int = 10000,
+    ):
+        """
+        :param urls: Replica database URLs
+        :param engine_factory: Creates an AsyncEngine from a URL
+        :param session_factory: Creates a session factory bound to an engine
+        """
+        self.replicas: List[Replica] = []
+        for index, url in enumerate(urls):
+            engine = engine_factory(url)
+            replica = Replica(f"replica{index}", engine, session_factory(engine))
+            self.replicas.append(replica)
+            self._watch_errors(replica)
+
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self.max_clients = max_clients
+
+        self._next = 0
+        self._tasks = set()
+        self._writers: "OrderedDict[str, float]" = OrderedDict()
+        self.routed = 0
+        self.fallbacks = 0
+
+    # ------------------------------
+    # Routing
+    # ------------------------------
+    def pick(self) -> Optional[Replica]:
+        """
+        Next usable replica in round-robin order, or None for the primary.
+        """
+        now = time.monotonic()
+        for replica in self.replicas:
+            if replica.next_check <= now and not replica.checking:
+                self._schedule_check(replica)
+
+        count = len(self.replicas)
+        for step in range(count):
+            replica = self.replicas[(self._next + step) % count]
+            if replica.healthy and replica.lag <= self.max_lag:
+                self._next = (self._next + step + 1) % count
+                self.routed += 1
+                return replica
+
+        self.fallbacks += 1
+        return None
+
+    # ------------------------------
+    # Read-your-writes
+    # ------------------------------
+    def note_write(self, client: Optional[str]):
+        if not client:
+            return
+        self._writers[client] = time.monotonic() + self.sticky_seconds
+        self._writers.move_to_end(client)
+        while len(self._writers) > self.max_clients:
+            self._writers.popitem(last=False)
+
+    def is_sticky(self, client: Optional[str]) -> bool:
+        if not client:
+            return False
+        until = self._writers.get(client)
+        if until is None:
+            return False
+        if until < time.monotonic():
+            del self._writers[client]
+            return False
+        return True
+
+    # ------------------------------
+    # Health
+    # ------------------------------
+    def _schedule_check(self, replica: Replica):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        replica.checking = True
+        task = loop.create_task(self.check(replica))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def check(self, replica: Replica):
+        """
+        Probe availability and replay lag of one replica.
+        """
+        try:
+            async with replica.engine.connect() as conn:
+                replica.lag = float(await conn.scalar(LAG_SQL) or 0)
+            if replica.failures:
+                logger.info("Read replica %s available again", replica.name)
+            replica.healthy = True
+            replica.failures = 0
+            replica.next_check = time.monotonic() + self.check_interval
+        except Exception as e:
+            self.mark_failed(replica, e)
+        finally:
+            replica.checking = False
+
+    def mark_failed(self, replica: Replica, error: Any = None):
+        if not replica.failures:
+            logger.warning("Read replica %s unavailable: %s", replica.name, error)
+        replica.healthy = False
+        replica.failures += 1
+        backoff = min(MAX_BACKOFF, self.check_interval * (2 ** min(replica.failures, 5)))
+        replica.next_check = time.monotonic() + backoff
+
+    def _watch_errors(self, replica: Replica):
+        @event.listens_for(replica.engine.sync_engine, "handle_error")
+        def on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_failed(replica, context.original_exception)
+
+    async def dispose(self):
+        for task in list(self._tasks):
+            task.cancel()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routed": self.routed,
+            "fallbacks": self.fallbacks,
+            "replicas": {
+                r.name: {"healthy": r.healthy, "lag": r.lag, "failures": r.failures}
+                for r in self.replicas
+            },
+        }
+
+
+# ------------------------------
+# Per-process replica set
+# ------------------------------
+replica_set: Optional[ReplicaSet] = None
+
+
+def client_key(context: Optional[ApiContext]) -> Optional[str]:
+    if context is None:
+        return None
+    if context.user_id:
+        return f"user:{context.user_id}"
+    addr = context.x_forwarded_for or context.remote_addr
+    return f"addr:{addr}" if addr else None
+
+
+def route(context: Optional[ApiContext]) -> Optional[Replica]:
+    """
+    Replica for a read-only session of the current request, or None.
+    """
+    if replica_set is None:
+        return None
+    if context is not None and (context.wrote or replica_set.is_sticky(client_key(context))):
+        return None
+    return replica_set.pick()
+
+
+def note_write():
+    """
+    Pin the current request and client to the primary for a while.
+    """
+    context = ApiContext.current()
+    if context is None:
+        return
+    context.wrote = True
+    if replica_set is not None:
+        replica_set.note_write(client_key(context))
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        note_write()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _on_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        note_write()
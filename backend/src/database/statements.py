@@ -0,0 +1,164 @@
+"""
+Statement caching for OpsPilot
+------------------------------
+Hot queries are built once per shape and reused, with their values
+passed as bind parameters at execution time:
+
+    stmt = cached_statement(("users.by_id",), lambda: (
+        sa.select(Users).where(Users.id == sa.bindparam("id"))
+    ))
+    await session.execute(stmt, {"id": user_id})
+
+A reused statement object keeps its memoized cache key, so each
+execution skips building the select() tree, generating the key and
+(through the engine's compiled cache) compiling the SQL. The SQL text
+is then the same every time, and asyncpg reuses the statement it
+prepared on the connection instead of parsing it again.
+
+Three caches are involved, each sized from the environment:
+
+- statement cache   prebuilt statements by shape (DB_STATEMENT_CACHE_SIZE)
+- compiled cache    SQLAlchemy's per-engine cache of compiled SQL
+                    (DB_QUERY_CACHE_SIZE)
+- prepared cache    asyncpg prepared statements per connection
+                    (DB_PREPARED_STATEMENT_CACHE_SIZE, 0 disables, as
+                    needed behind pgbouncer in transaction mode)
+
+statement_stats() reports the hit rates of all three for this process.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.engine.interfaces import CacheStats
+
+
+def engine_settings(url: str) -> Dict[str, Any]:
+    """
+    Compiled and prepared statement cache sizes, passed to create_async_engine().
+    """
+    settings: Dict[str, Any] = {"query_cache_size": int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))}
+    if url.startswith("postgresql+asyncpg"):
+        settings["connect_args"] = {
+            "prepared_statement_cache_size": int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "500")),
+        }
+    return settings
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+# ------------------------------
+# Prebuilt statements
+# ------------------------------
+class StatementCache:
+    """
+    Statements by shape key, LRU.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """
+        :param key: Query shape; must cover everything build() branches on,
+                    never the values bound at execution time
+        :param build: Builds the statement on a miss
+        """
+        stmt = self._entries.get(key)
+        if stmt is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return stmt
+
+        self.misses += 1
+        stmt = build()
+        self._entries[key] = stmt
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return stmt
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": _hit_rate(self.hits, self.misses),
+        }
+
+
+# Resized from DB_STATEMENT_CACHE_SIZE by database.aio_session.init_engine()
+statement_cache = StatementCache()
+
+
+def cached_statement(key: Hashable, build: Callable[[], Any]) -> Any:
+    return statement_cache.get(key, build)
+
+
+# ------------------------------
+# Compiled / prepared statement counters
+# ------------------------------
+class ExecutionStats:
+    """
+    Compiled cache and prepared statement hits of the instrumented engines.
+    """
+
+    def __init__(self):
+        self.compiled_hits = 0
+        self.compiled_misses = 0
+        self.uncached = 0
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+
+    def instrument(self, engine):
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                if context.cache_hit is CacheStats.CACHE_HIT:
+                    self.compiled_hits += 1
+                elif context.cache_hit is CacheStats.CACHE_MISS:
+                    self.compiled_misses += 1
+                else:
+                    self.uncached += 1
+
+            # LRU of the asyncpg adaptor, None when prepared caching is disabled
+            prepared = getattr(conn.connection.dbapi_connection, "_prepared_statement_cache", None)
+            if prepared is not None:
+                if statement in prepared:
+                    self.prepared_hits += 1
+                else:
+                    self.prepared_misses += 1
+
+        return engine
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "compiled": {
+                "hits": self.compiled_hits,
+                "misses": self.compiled_misses,
+                "uncached": self.uncached,
+                "hit_rate": _hit_rate(self.compiled_hits, self.compiled_misses),
+            },
+            "prepared": {
+                "hits": self.prepared_hits,
+                "misses": self.prepared_misses,
+                "hit_rate": _hit_rate(self.prepared_hits, self.prepared_misses),
+            },
+        }
+
+
+execution_stats = ExecutionStats()
+
+
+def statement_stats() -> Dict[str, Any]:
+    return {"statements": statement_cache.stats(), **execution_stats.stats()}
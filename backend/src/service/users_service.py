@@ -1,9 +1,55 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from models.users import Users
-from typing import Optional
+from database.aio_session import fetch_version
+from database.bulk import delete_rows, insert_rows, update_rows
+from database.counting import count_rows, fetch_page
+from database.keyset import KeysetPaginator
+from database.projection import fetch_dicts, public_columns
+from database.statements import cached_statement
+from typing import List, Optional, TYPE_CHECKING
 from datetime import datetime
-from webapi.schemas.users import UserCreate, UserUpdate
+from core.const.secrets import CODES
+from core.exceptions import ApiException
+
+if TYPE_CHECKING:
+    from webapi.schemas.users import UserCreate, UserUpdate
+
+# SQLSTATE of a unique constraint violation
+UNIQUE_VIOLATION = "23505"
+
+# Columns users may be sorted by in cursor mode (never password)
+SORTABLE_COLUMNS = ("id", "name", "age", "birthdate", "sex", "status_code", "created_at", "updated_at")
+
+
+def _sqlstate(e: IntegrityError) -> Optional[str]:
+    # SQLSTATE from the DBAPI error or, under asyncpg, the driver error it wraps
+    orig = e.orig
+    return getattr(orig, "sqlstate", None) or getattr(getattr(orig, "__cause__", None), "sqlstate", None)
+
+
+def _users_query(has_status: bool, sortby: Optional[str], descending: bool, paged: bool):
+    """
+    User list statement of one shape, built once (see database.statements).
+    Selects the public columns only; rows are read as dicts, not Users.
+    Binds: deleted, status, limit, offset.
+    """
+    def build():
+        users = Users.__table__
+        query = select(*public_columns(Users)).where(users.c.is_deleted == bindparam("deleted"))
+        if has_status:
+            query = query.where(users.c.status_code == bindparam("status"))
+        if sortby:
+            column = users.c[sortby]
+            query = query.order_by(column.desc() if descending else column.asc())
+        if paged:
+            query = query.limit(bindparam("limit")).offset(bindparam("offset"))
+        return query
+
+    return cached_statement(("users.list", has_status, sortby, descending, paged), build)
+
 
 class UsersService:
     """
@@ -25,109 +71,165 @@ class UsersService:
         descending: bool = False,
         pageindex: int = 0,
         pagesize: int = 10,
+        cursor: Optional[str] = None,
+        keyset: bool = False,
+        count: Optional[str] = None,
     ):
-        filters = []
-
+        """
+        Offset mode returns a list of users. Keyset mode (keyset=True or a
+        cursor) returns {"data", "next_cursor", "prev_cursor"}. Users are
+        read as plain dicts of their public columns, without ORM instances.
+
+        With count (exact / estimate / cached / none, see database.counting)
+        offset mode returns {"data", "total", "has_more"}, and keyset mode
+        adds "total".
+        """
+        if keyset or cursor:
+            return await self._get_users_keyset(
+                status=status, deleted=deleted, sortby=sortby,
+                descending=descending, pagesize=pagesize, cursor=cursor, count=count,
+            )
+
+        # Unknown sort columns leave the list unordered and never become new cache shapes
+        if sortby not in Users.__table__.columns:
+            sortby = None
+        params = {"deleted": deleted}
         if status:
-            filters.append(Users.status_code == status)
-
-        query = select(Users)
-        if filters:
-            query = query.where(*filters)
-
-        query = query.where(Users.is_deleted == deleted)
-
-        column = getattr(Users, sortby, None)
-        if column:
-            query = query.order_by(column.desc() if descending else column.asc())
-
-        query = query.limit(pagesize).offset(pageindex * pagesize)
+            params["status"] = status
+
+        if count:
+            query = _users_query(bool(status), sortby, descending, paged=False)
+            page = await fetch_page(self.session, query, pagesize, pageindex * pagesize, count, params, as_dicts=True)
+            result = {
+                "data": page.data,
+                "total": page.total,
+                "has_more": page.has_more,
+            }
+            if page.estimated:
+                result["estimated"] = True
+            return result
+
+        query = _users_query(bool(status), sortby, descending, paged=True)
+        params.update(limit=pagesize, offset=pageindex * pagesize)
+        return await fetch_dicts(self.session, query, params)
+
+    async def _get_users_keyset(self, *, status, deleted, sortby, descending, pagesize, cursor, count):
+        paginator = KeysetPaginator(Users, sortby, descending, SORTABLE_COLUMNS)
+
+        query = select(*public_columns(Users)).where(Users.is_deleted == deleted)
+        if status:
+            query = query.where(Users.status_code == status)
+
+        rows = await self.session.execute(paginator.apply(query, cursor, pagesize))
+        users, next_cursor, prev_cursor = paginator.page(rows.all(), cursor, pagesize)
+        result = {
+            "data": Users.serialize_many(users),
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+        if count:
+            # Total of the filtered list, not of the rows after the cursor
+            result["total"], estimated = await count_rows(self.session, query, count)
+            if estimated:
+                result["estimated"] = True
+        return result
 
-        result = await self.session.execute(query)
-        users = result.scalars().all()
-        return [u.to_dict() for u in users]
+    # -------------------------
+    # Read: Version token of the user list
+    # -------------------------
+    async def get_users_version(self, *, status: Optional[str] = None, deleted: bool = False):
+        filters = [Users.is_deleted == bindparam("deleted")]
+        params = {"deleted": deleted}
+        if status:
+            filters.append(Users.status_code == bindparam("status"))
+            params["status"] = status
+        return await fetch_version(self.session, Users, filters, params, key=("users.version", bool(status)))
 
     # -------------------------
     # Read: Get single user by ID
     # -------------------------
     async def get_user_by_id(self, user_id: int) -> Optional[Users]:
-        query = select(Users).where(Users.id == user_id, Users.is_deleted == False)
-        result = await self.session.execute(query)
+        query = cached_statement(("users.by_id",), lambda: (
+            select(Users).where(Users.id == bindparam("id"), Users.is_deleted == False)
+        ))
+        result = await self.session.execute(query, {"id": user_id})
         return result.scalars().first()
 
     # -------------------------
     # Create: Add a new user
     # -------------------------
-    async def create_user(self, data: dict) -> Users:
-        # Convert birthdate string to date
-        if "birthdate" in data and isinstance(data["birthdate"], str):
-            try:
-                data["birthdate"] = datetime.fromisoformat(data["birthdate"][:10]).date()
-            except ValueError:
-                raise ValueError("Invalid birthdate format, must be YYYY-MM-DD")
-
-        # Validate input using Pydantic
-        user_in = UserCreate(**data)
-
-        # Check if user already exists
-        stmt = select(Users).where(Users.name == user_in.name)
-        result = await self.session.execute(stmt)
-        if result.scalars().first():
-            raise ValueError("User already exists")
-
-        user = Users(**user_in.dict())
-        self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+    async def create_user(self, user_in: "UserCreate") -> Users:
+        # One round trip: the unique index decides, no check-then-insert race
+        stmt = (
+            insert(Users)
+            .values(**user_in.model_dump())
+            .on_conflict_do_nothing(index_elements=[Users.name])
+            .returning(Users)
+        )
+        user = (await self.session.execute(stmt)).scalars().first()
+        if user is None:
+            raise ApiException(CODES.USER_NAME_EXITS, f"User {user_in.name} already exists")
         return user
 
     # -------------------------
     # Update: Update user by ID
     # -------------------------
-    async def update_user(self, data: dict) -> Optional[Users]:
-        if "id" not in data:
-            raise ValueError("Missing user id")
-
-        user_id = data["id"]
-        stmt = select(Users).where(Users.id == user_id, Users.is_deleted == False)
-        result = await self.session.execute(stmt)
-        user = result.scalars().first()
-        if not user:
-            return None
-
-        # Convert birthdate string to date
-        if "birthdate" in data and isinstance(data["birthdate"], str):
-            try:
-                data["birthdate"] = datetime.fromisoformat(data["birthdate"][:10]).date()
-            except ValueError:
-                raise ValueError("Invalid birthdate format, must be YYYY-MM-DD")
-
-        # Validate input using Pydantic
-        user_in = UserUpdate(**data)
-
-        # Update attributes
-        for key, value in user_in.dict(exclude_unset=True).items():
-            if hasattr(user, key):
-                setattr(user, key, value)
-
-        user.updated_at = datetime.utcnow()
-        self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+    async def update_user(self, user_in: "UserUpdate") -> Users:
+        values = user_in.model_dump(exclude_unset=True, exclude={"id"})
+        values["updated_at"] = datetime.utcnow()
+        stmt = (
+            update(Users)
+            .where(Users.id == user_in.id, Users.is_deleted == False)
+            .values(**values)
+            .returning(Users)
+            .execution_options(populate_existing=True)
+        )
+        try:
+            user = (await self.session.execute(stmt)).scalars().first()
+        except IntegrityError as e:
+            # name is the only unique column an update can change
+            if "name" in values and _sqlstate(e) == UNIQUE_VIOLATION:
+                raise ApiException(CODES.USER_NAME_EXITS, f"User {values['name']} already exists") from e
+            raise
+        if user is None:
+            raise ApiException(CODES.RECORD_NOT_EXITS, f"User {user_in.id} does not exist")
         return user
 
     # -------------------------
     # Delete: Soft delete user by ID
     # -------------------------
     async def delete_user(self, user_id: int) -> bool:
-        stmt = select(Users).where(Users.id == user_id, Users.is_deleted == False)
-        result = await self.session.execute(stmt)
-        user = result.scalars().first()
-        if not user:
-            return False
-
-        user.is_deleted = True
-        user.updated_at = datetime.utcnow()
-        self.session.add(user)
-        await self.session.commit()
+        stmt = (
+            update(Users)
+            .where(Users.id == user_id, Users.is_deleted == False)
+            .values(is_deleted=True, updated_at=datetime.utcnow())
+            .returning(Users.id)
+        )
+        if (await self.session.execute(stmt)).first() is None:
+            raise ApiException(CODES.RECORD_NOT_EXITS, f"User {user_id} does not exist")
         return True
+
+    # -------------------------
+    # Bulk: one statement per chunk, per-row results
+    # -------------------------
+    async def bulk_create_users(self, users: List["UserCreate"]) -> List[dict]:
+        rows = [user_in.model_dump() for user_in in users]
+        return await insert_rows(
+            self.session, Users.__table__, rows,
+            conflict=("name",), conflict_code=CODES.USER_NAME_EXITS,
+        )
+
+    async def bulk_update_users(self, users: List["UserUpdate"]) -> List[dict]:
+        rows = [user_in.model_dump(exclude_unset=True) for user_in in users]
+        return await update_rows(
+            self.session, Users.__table__, rows,
+            criterions=(Users.is_deleted == False,),
+            values={"updated_at": datetime.utcnow()},
+        )
+
+    async def bulk_delete_users(self, user_ids: List[int]) -> List[dict]:
+        return await delete_rows(
+            self.session, Users.__table__, user_ids,
+            values={"updated_at": datetime.utcnow()},
+        )
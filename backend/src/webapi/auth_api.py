@@ -1,42 +1,33 @@
 # webapi/auth_api.py
-from datetime import datetime
+from typing import TYPE_CHECKING
+
 from core.api.api import Api
 from database.aio_session import get_async_session
 from sqlalchemy import select
 from models.users import Users
-from pydantic import BaseModel, Field
-
-api = Api.get_instance()
-
 
-# -------------------------------
-# Pydantic model for login
-# -------------------------------
-class LoginRequest(BaseModel):
-    name: str
-    password: str
+if TYPE_CHECKING:
+    from webapi.schemas.auth import LoginRequest
 
-
-class LoginResponse(BaseModel):
-    id: int
-    name: str
-    status_code: str | None = None
+api = Api.get_instance()
 
 
 # -------------------------------
 # POST /login
 # -------------------------------
-@api.post("login")
-async def login(body: dict):
-    try:
-        login_data = LoginRequest(**body)
-    except Exception as e:
-        return {"error": f"Invalid input: {e}"}
+@api.post(
+    "login",
+    schema="webapi.schemas.auth:LoginRequest",
+    rate_limit={"rate": 1, "burst": 10, "by": ("ip",)},
+)
+async def login(body: "LoginRequest"):
+    # pydantic schemas load on first use
+    from webapi.schemas.auth import LoginResponse
 
     async with get_async_session() as session:
         query = select(Users).where(
-            Users.name == login_data.name,
-            Users.password == login_data.password,
+            Users.name == body.name,
+            Users.password == body.password,
             Users.is_deleted == False,
         )
         result = await session.execute(query)
@@ -49,4 +40,4 @@ async def login(body: dict):
             id=user.id,
             name=user.name,
             status_code=user.status_code
-        ).dict()
+        ).model_dump()
@@ -2,32 +2,166 @@
 """
 OpsPilot Web API Entry
 ----------------------
-Directly loads API modules and starts RESTful server.
+Loads API modules and starts RESTful server.
+
+Server settings (environment):
+    API_HOST, API_PORT, API_WORKERS, API_UNIX
+    API_COMPRESS (0 disables), API_COMPRESS_MIN_SIZE, API_COMPRESS_OFFLOAD_SIZE
+    API_METRICS_DIR (metrics snapshots shared by workers)
+    API_MAX_CONCURRENCY (0 disables), API_MAX_QUEUE, API_QUEUE_TIMEOUT,
+    API_TARGET_LATENCY (enables the adaptive limit)
+    API_DRAIN_DELAY, API_DRAIN_TIMEOUT (graceful shutdown)
+    API_INSPECTOR=1 (enables `sanic inspect restart --zero-downtime`
+                     for worker-by-worker rolling restarts)
+    API_MANIFEST (endpoint manifest, rewritten when API modules change)
+    API_IMPORT_REPORT=1 (prints the import time of each API module)
+Per-worker pool settings are read by database.aio_session:
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE
+    DATABASE_REPLICA_URLS, DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK_INTERVAL,
+    DB_READ_YOUR_WRITES (read replica routing, see database.replicas)
+    DB_STATEMENT_CACHE_SIZE, DB_QUERY_CACHE_SIZE, DB_PREPARED_STATEMENT_CACHE_SIZE
+    (statement caches, see database.statements; hit rates at /__database)
 """
 
+import os
+import tempfile
 import traceback
+from sanic.response import json as json_response
 from core.server.restful_server import RESTFulApiServer
-from core.api.api_core import ApiCore
+from core.server.compression import ResponseCompressor
+from core.server.drain import Drainer
+from core.server.metrics import clear_directory
+from core.api.api_admission import ConcurrencyLimiter
 from core.api.api import Api
+from core.utils.module_loader import import_modules
+from database.aio_session import init_engine, dispose_engine, shared_session
+from database.statements import statement_stats
+
+
+# Set once the API modules of this process are imported
+_apis_loaded = False
+
+
+def load_apis():
+    """
+    Import API modules so that their decorators register endpoints.
+    Runs once per process: main() and create_app() share one process
+    when the server runs without workers.
+    """
+    global _apis_loaded
+    if _apis_loaded:
+        return
+    import_modules(
+        "webapi",
+        manifest=os.getenv("API_MANIFEST") or None,
+        report=os.getenv("API_IMPORT_REPORT", "0") == "1",
+    )
+    _apis_loaded = True
+
+
+def metrics_dir():
+    """
+    Metrics snapshot directory, only needed with several workers.
+    """
+    if int(os.getenv("API_WORKERS", "1")) <= 1:
+        return None
+    return os.getenv("API_METRICS_DIR") or os.path.join(tempfile.gettempdir(), "opspilot-metrics")
+
+
+def admission():
+    """
+    Global concurrency limit of each worker.
+    """
+    limit = int(os.getenv("API_MAX_CONCURRENCY", "0"))
+    if limit <= 0:
+        return None
+
+    adaptive = None
+    if os.getenv("API_TARGET_LATENCY"):
+        adaptive = {
+            "target_latency": float(os.getenv("API_TARGET_LATENCY")),
+            "min_limit": max(1, limit // 10),
+            "max_limit": limit,
+        }
+
+    return ConcurrencyLimiter(
+        "global",
+        limit,
+        max_queue=int(os.getenv("API_MAX_QUEUE", str(limit * 2))),
+        queue_timeout=float(os.getenv("API_QUEUE_TIMEOUT", "1")),
+        adaptive=adaptive,
+    )
+
+
+async def open_database(app):
+    """
+    Create the engine and pool inside the worker process.
+    """
+    init_engine()
+
+
+async def close_database(app):
+    await dispose_engine()
+
+
+async def database_stats(_):
+    """
+    Statement, compiled and prepared cache hit rates of this worker
+    """
+    return json_response(statement_stats())
+
+
+def create_app():
+    """
+    App factory, called once in every worker process.
+    """
+    load_apis()
+    api_core = Api.get_instance().api_core
+
+    compressor = None
+    if os.getenv("API_COMPRESS", "1") != "0":
+        compressor = ResponseCompressor(
+            min_size=int(os.getenv("API_COMPRESS_MIN_SIZE", "1024")),
+            offload_size=int(os.getenv("API_COMPRESS_OFFLOAD_SIZE", str(256 * 1024))),
+        )
+
+    app = RESTFulApiServer.create_app(
+        route="/api",
+        api_core=api_core,
+        batch_session_scope=shared_session,
+        compressor=compressor,
+        metrics_dir=metrics_dir(),
+        admission=admission(),
+        drainer=Drainer(
+            health_delay=float(os.getenv("API_DRAIN_DELAY", "5")),
+            deadline=float(os.getenv("API_DRAIN_TIMEOUT", "30")),
+        ),
+    )
+    app.config.INSPECTOR = os.getenv("API_INSPECTOR", "0") == "1"
+    app.register_listener(open_database, "before_server_start")
+    app.register_listener(close_database, "after_server_stop")
+    app.add_route(database_stats, "/__database")
+    return app
 
-# Import API modules so that their decorators register endpoints
-import webapi.hello_api
-import webapi.users_api
-import webapi.auth_api
 
 def main():
     try:
-        # Get the singleton Api instance
-        api_instance = Api.get_instance()
-        api_core = api_instance._api_core
+        load_apis()
+        api_core = Api.get_instance().api_core
 
         # Debug: print registered APIs
         print("Registered APIs:", api_core.get_registry().keys())
 
+        if metrics_dir():
+            clear_directory(metrics_dir())
+
         # Run RESTful server
         RESTFulApiServer.run_api_server(
-            port=7000,
-            api_core=api_core
+            host=os.getenv("API_HOST", "0.0.0.0"),
+            port=int(os.getenv("API_PORT", "7000")),
+            workers=int(os.getenv("API_WORKERS", "1")),
+            unix=os.getenv("API_UNIX") or None,
+            app_factory=create_app,
         )
     except KeyboardInterrupt:
         print("Server stopped by user.")
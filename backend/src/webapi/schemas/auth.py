@@ -0,0 +1,13 @@
+# schemas/auth.py
+from pydantic import BaseModel
+
+
+class LoginRequest(BaseModel):
+    name: str
+    password: str
+
+
+class LoginResponse(BaseModel):
+    id: int
+    name: str
+    status_code: str | None = None
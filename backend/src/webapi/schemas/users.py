@@ -1,6 +1,17 @@
 # schemas/user.py
 from datetime import date
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+# Upper bound of rows accepted by one bulk request
+MAX_BULK_SIZE = 5000
+
+
+def _date_prefix(value):
+    # Accept full ISO datetimes ("2000-01-31T08:00:00") for date fields
+    if isinstance(value, str) and len(value) > 10:
+        return value[:10]
+    return value
+
 
 class UserCreate(BaseModel):
     name: str
@@ -10,6 +21,8 @@ class UserCreate(BaseModel):
     sex: int | None = None
     status_code: str | None = None
 
+    _birthdate = field_validator("birthdate", mode="before")(_date_prefix)
+
 class UserUpdate(BaseModel):
     id: int
     name: str | None = None
@@ -17,4 +30,18 @@ class UserUpdate(BaseModel):
     password: str | None = None
     birthdate: date | None = None
     sex: int | None = None
-    status_code: str | None = None
\ No newline at end of file
+    status_code: str | None = None
+
+    _birthdate = field_validator("birthdate", mode="before")(_date_prefix)
+
+class UserDelete(BaseModel):
+    id: int
+
+class UsersBulkCreate(BaseModel):
+    users: list[UserCreate] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+class UsersBulkUpdate(BaseModel):
+    users: list[UserUpdate] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+class UsersBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BULK_SIZE)
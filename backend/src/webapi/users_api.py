@@ -1,22 +1,51 @@
-from datetime import datetime
+from typing import TYPE_CHECKING
+
 from core.api.api import Api
 from service.users_service import UsersService
 from database.aio_session import get_async_session
-from webapi.schemas.users import UserCreate, UserUpdate
+
+if TYPE_CHECKING:
+    from webapi.schemas.users import (
+        UserCreate, UserUpdate, UserDelete, UsersBulkCreate, UsersBulkUpdate, UsersBulkDelete,
+    )
 
 api = Api.get_instance()
 
+
+async def users_pages_version(status: str = None, **_):
+    """
+    ETag version token of users_pages: max(updated_at) and count.
+    """
+    async with get_async_session() as session:
+        return await UsersService(session).get_users_version(status=status)
+
+
 # -------------------------------
 # GET /users_pages
 # -------------------------------
-@api.get("users_pages")
+@api.get(
+    "users_pages",
+    cache={"ttl": 30, "max_entries": 256, "tags": ("users",)},
+    etag=users_pages_version,
+    coalesce=True,
+    rate_limit={"rate": 20, "burst": 40, "by": ("ip",)},
+    concurrency={"limit": 20, "max_queue": 50, "queue_timeout": 1},
+)
 async def get_users(
     status: str = None,
     pageindex: int = 0,
     pagesize: int = 10,
     sortby: str = "id",
     descending: int = 0,
+    cursor: str = None,
+    keyset: int = 0,
+    count: str = None,
 ):
+    """
+    Offset paging by pageindex, or keyset paging with keyset=1 / cursor
+    (returns {"data", "next_cursor", "prev_cursor"}).
+    count=exact|estimate|cached|none adds the total / has_more.
+    """
     async with get_async_session() as session:
         service = UsersService(session)
         users = await service.get_users(
@@ -25,13 +54,21 @@ async def get_users(
             pagesize=pagesize,
             sortby=sortby,
             descending=bool(descending),
+            cursor=cursor,
+            keyset=bool(keyset),
+            count=count,
         )
         return users
 
 # -------------------------------
 # GET /users/{id}
 # -------------------------------
-@api.get("users")
+@api.get(
+    "users",
+    cache={"ttl": 30, "max_entries": 1024, "vary": ("user_id",), "tags": ("users",)},
+    etag=True,
+    coalesce=True,
+)
 async def get_user(user_id: int):
     async with get_async_session() as session:
         service = UsersService(session)
@@ -43,35 +80,61 @@ async def get_user(user_id: int):
 # -------------------------------
 # POST /users_create
 # -------------------------------
-@api.post("users_create")
-async def create_user(body: dict):
+@api.post("users_create", schema="webapi.schemas.users:UserCreate", invalidates=("users",))
+async def create_user(body: "UserCreate"):
     async with get_async_session() as session:
         service = UsersService(session)
-        new_user = await service.create_user(body)  # Service handles validation & conversion
+        new_user = await service.create_user(body)  # USER_NAME_EXITS on a duplicate name
         return new_user.to_dict()
 
 # -------------------------------
 # PUT /users_update
 # -------------------------------
-@api.put("users_update")
-async def update_user(body: dict):
-    if "id" not in body:
-        return {"error": "Missing user id"}
+@api.put("users_update", schema="webapi.schemas.users:UserUpdate", invalidates=("users",))
+async def update_user(body: "UserUpdate"):
     async with get_async_session() as session:
         service = UsersService(session)
-        updated_user = await service.update_user(body)  # Service handles validation & conversion
-        if not updated_user:
-            return {"error": "User not found"}
+        updated_user = await service.update_user(body)  # RECORD_NOT_EXITS if missing
         return updated_user.to_dict()
 
 # -------------------------------
 # DELETE /users_delete
 # -------------------------------
-@api.delete("users_delete")
-async def delete_user(body: dict):
-    if "id" not in body:
-        return {"error": "Missing user id"}
+@api.delete("users_delete", schema="webapi.schemas.users:UserDelete", invalidates=("users",))
+async def delete_user(body: "UserDelete"):
     async with get_async_session() as session:
         service = UsersService(session)
-        result = await service.delete_user(body["id"])
+        result = await service.delete_user(body.id)
         return {"success": result}
+
+
+def bulk_summary(results: list) -> dict:
+    failed = sum(1 for r in results if "error" in r)
+    return {"success": len(results) - failed, "failed": failed, "results": results}
+
+# -------------------------------
+# POST /users_bulk_create
+# -------------------------------
+@api.post("users_bulk_create", schema="webapi.schemas.users:UsersBulkCreate", invalidates=("users",))
+async def bulk_create_users(body: "UsersBulkCreate"):
+    async with get_async_session() as session:
+        results = await UsersService(session).bulk_create_users(body.users)
+        return bulk_summary(results)
+
+# -------------------------------
+# PUT /users_bulk_update
+# -------------------------------
+@api.put("users_bulk_update", schema="webapi.schemas.users:UsersBulkUpdate", invalidates=("users",))
+async def bulk_update_users(body: "UsersBulkUpdate"):
+    async with get_async_session() as session:
+        results = await UsersService(session).bulk_update_users(body.users)
+        return bulk_summary(results)
+
+# -------------------------------
+# DELETE /users_bulk_delete
+# -------------------------------
+@api.delete("users_bulk_delete", schema="webapi.schemas.users:UsersBulkDelete", invalidates=("users",))
+async def bulk_delete_users(body: "UsersBulkDelete"):
+    async with get_async_session() as session:
+        results = await UsersService(session).bulk_delete_users(body.ids)
+        return bulk_summary(results)
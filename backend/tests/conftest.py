@@ -0,0 +1,36 @@
+import os
+import sys
+
+import pytest
+from sanic import Sanic
+
+# API modules import from the src root, as webapi.main does
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from core.api.api import Api  # noqa: E402
+from core.api.api_core import ApiCore  # noqa: E402
+from core.server import restful_server  # noqa: E402
+from core.server.restful_server import RESTFulApiServer  # noqa: E402
+
+# Every test builds its own app under the same name
+Sanic.test_mode = True
+
+
+@pytest.fixture
+def api():
+    """
+    Api bound to a fresh registry instead of the process singleton.
+    """
+    return Api(ApiCore())
+
+
+@pytest.fixture
+def make_app(monkeypatch):
+    """
+    Build the gateway app for the endpoints registered on an Api.
+    """
+    def build(api: Api, **kwargs) -> Sanic:
+        monkeypatch.setattr(restful_server, "app", None)
+        return RESTFulApiServer.create_app(route="/api", api_core=api.api_core, **kwargs)
+
+    return build
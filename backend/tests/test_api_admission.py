@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from core.api.api_admission import ConcurrencyLimiter, build_concurrency
+
+
+def test_queue_hands_over_slots_in_order():
+    async def run():
+        limiter = ConcurrencyLimiter("read", 1, max_queue=2, queue_timeout=1)
+        order = []
+
+        async def request(name):
+            if not await limiter.acquire():
+                order.append(f"{name} rejected")
+                return
+            order.append(name)
+            await asyncio.sleep(0.01)
+            limiter.release()
+
+        await asyncio.gather(*(request(n) for n in ("a", "b", "c", "d")))
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(run())
+    assert order == ["a", "d rejected", "b", "c"]
+    assert stats == {"limit": 1, "in_use": 0, "waiting": 0, "admitted": 3, "rejected": 1}
+
+
+def test_queue_timeout_rejects():
+    async def run():
+        limiter = ConcurrencyLimiter("read", 1, max_queue=1, queue_timeout=0.01)
+        assert await limiter.acquire()
+        admitted = await limiter.acquire()
+        limiter.release()
+        return admitted, limiter
+
+    admitted, limiter = asyncio.run(run())
+    assert admitted is False
+    assert limiter.stats()["waiting"] == 0
+    assert ConcurrencyLimiter.is_shedding()
+
+
+def test_cancelled_waiter_leaves_queue():
+    async def run():
+        limiter = ConcurrencyLimiter("read", 1, max_queue=1, queue_timeout=1)
+        assert await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        return limiter.stats()
+
+    stats = asyncio.run(run())
+    assert stats["in_use"] == 0 and stats["waiting"] == 0
+
+
+def test_adaptive_limit():
+    limiter = ConcurrencyLimiter(
+        "read", 10, adaptive={"target_latency": 0.1, "min_limit": 2, "max_limit": 20}
+    )
+    limiter.in_use = 1
+    limiter.release(elapsed=1.0)
+    assert limiter.limit == pytest.approx(9.0)
+
+    # At most one decrease per target_latency
+    limiter.in_use = 1
+    limiter.release(elapsed=1.0)
+    assert limiter.limit == pytest.approx(9.0)
+
+    limiter.in_use = 1
+    limiter.release(elapsed=0.01)
+    assert limiter.limit == pytest.approx(9.0 + 1 / 9.0)
+
+
+def test_gateway_answers_503(api, make_app):
+    @api.get("guarded", concurrency={"limit": 1, "max_queue": 0})
+    async def guarded():
+        return {"ok": True}
+
+    app = make_app(api)
+    descriptor = api.api_core.resolve("GET", "guarded")
+    descriptor["concurrency_limiter"].in_use = 1
+
+    _, response = app.test_client.get("/api/guarded")
+    assert response.status == 503
+    assert response.headers["Retry-After"] == "1"
+
+    descriptor["concurrency_limiter"].in_use = 0
+    assert app.test_client.get("/api/guarded")[1].status == 200
+
+
+def test_invalid_options():
+    assert build_concurrency("read", None) is None
+    with pytest.raises(ValueError):
+        build_concurrency("read", {"limit": 0})
@@ -0,0 +1,83 @@
+import asyncio
+
+from core.api.api_admission import ConcurrencyLimiter
+from core.api.api_context import ApiContext
+from core.const.secrets import CODES
+
+
+def test_batch_entries_take_endpoint_admission(api, make_app):
+    @api.get("slow", concurrency={"limit": 1, "max_queue": 0})
+    async def slow(n: int = 0):
+        await asyncio.sleep(0.05)
+        return n
+
+    app = make_app(api)
+    _, response = app.test_client.post(
+        "/api/_batch", json=[{"api": "slow", "args": {"n": n}} for n in range(3)]
+    )
+    assert response.status == 200
+    results = response.json
+    assert sorted(r["status"] for r in results) == [200, 503, 503]
+    assert all(r["code"] == CODES.SERVICE_UNAVAILABLE for r in results if r["status"] == 503)
+    assert api.api_core.resolve("GET", "slow")["concurrency_limiter"].in_use == 0
+
+
+def test_batch_entries_take_global_admission(api, make_app):
+    @api.get("fast")
+    async def fast():
+        return 1
+
+    admission = ConcurrencyLimiter("global", 1)
+    admission.in_use = 1
+    app = make_app(api, admission=admission)
+
+    _, response = app.test_client.post("/api/_batch", json=[{"api": "fast"}])
+    assert response.json[0]["status"] == 503
+
+    admission.in_use = 0
+    _, response = app.test_client.post("/api/_batch", json=[{"api": "fast"}])
+    assert response.json == [{"status": 200, "data": 1}]
+    assert admission.in_use == 0
+
+
+def test_batch_entries_are_measured(api, make_app):
+    @api.get("counted")
+    async def counted():
+        return 1
+
+    app = make_app(api)
+    app.test_client.post("/api/_batch", json=[{"api": "counted"}, {"api": "missing"}])
+
+    _, response = app.test_client.get("/__metrics")
+    assert 'api="counted",method="GET",code="0"} 1' in response.text
+    assert 'api="__unknown__",method="GET",code="%s"} 1' % CODES.UNREGISTERED_METHOD in response.text
+
+
+def test_batch_entry_failure_hides_error_text(api, make_app, caplog):
+    @api.get("broken")
+    async def broken():
+        raise RuntimeError("password authentication failed for user admin")
+
+    app = make_app(api)
+    _, response = app.test_client.post("/api/_batch", json=[{"api": "broken"}])
+
+    assert response.json == [{"status": 500, "error": "Internal server error", "code": CODES.UNKNOWN_ERROR}]
+    assert "password" not in response.text
+    assert any(r.exc_info and "password" in str(r.exc_info[1]) for r in caplog.records)
+
+
+def test_batch_entries_carry_the_client(api, make_app):
+    from database.replicas import client_key
+
+    @api.get("whoami")
+    async def whoami():
+        return client_key(ApiContext.current())
+
+    app = make_app(api)
+    _, response = app.test_client.post("/api/_batch", json=[{"api": "whoami"}])
+    assert response.json == [{"status": 200, "data": "addr:127.0.0.1"}]
+
+    _, response = app.test_client.post(
+        "/api/_batch", json=[{"api": "whoami"}], headers={"x-forwarded-for": "203.0.113.9"}
+    )
+    assert response.json == [{"status": 200, "data": "addr:203.0.113.9"}]
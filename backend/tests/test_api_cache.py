@@ -0,0 +1,65 @@
+from core.api.api_cache import ResponseCache
+
+
+def test_lru_and_byte_bounds():
+    cache = ResponseCache("read", max_entries=2, max_bytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == (b"1234", None)
+
+    cache.set("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] <= 10
+
+
+def test_set_skipped_after_clear():
+    cache = ResponseCache("read")
+    generation = cache.generation
+    cache.clear()
+    cache.set("key", b"stale", None, generation)
+    assert cache.get("key") is None
+
+    cache.set("key", b"fresh", None, cache.generation)
+    assert cache.get("key") == (b"fresh", None)
+
+
+def test_write_invalidates_cached_read(api, make_app):
+    rows = [1]
+
+    @api.get("items", cache={"ttl": 60, "tags": ("items",)})
+    async def items():
+        return list(rows)
+
+    @api.post("items_add", invalidates=("items",))
+    async def items_add():
+        rows.append(len(rows) + 1)
+        return {"count": len(rows)}
+
+    client = make_app(api).test_client
+
+    assert client.get("/api/items")[1].json == [1]
+    rows.append(99)
+    assert client.get("/api/items")[1].json == [1]
+
+    client.post("/api/items_add")
+    assert client.get("/api/items")[1].json == [1, 99, 3]
+
+
+def test_read_racing_a_write_is_not_cached(api, make_app):
+    rows = [1]
+
+    @api.get("items", cache={"ttl": 60, "tags": ("items",)})
+    async def items():
+        snapshot = list(rows)
+        # A write lands while this read is in flight
+        rows.append(2)
+        api.api_core.invalidate(("items",))
+        return snapshot
+
+    client = make_app(api).test_client
+
+    assert client.get("/api/items")[1].json == [1]
+    assert client.get("/api/items")[1].json == [1, 2]
@@ -0,0 +1,54 @@
+PREFLIGHT = {"Origin": "https://ops.example.com", "Access-Control-Request-Method": "GET"}
+
+
+def register(api):
+    @api.get("items")
+    async def items():
+        return [1]
+
+    @api.post("items_add")
+    async def items_add():
+        return {"ok": True}
+
+
+def test_options_answered_by_gateway(api, make_app):
+    register(api)
+    client = make_app(api).test_client
+
+    _, response = client.options("/api/items", headers=PREFLIGHT)
+    assert response.status == 204
+    assert response.headers["Allow"] == "GET, HEAD, OPTIONS"
+    assert response.headers["Access-Control-Allow-Origin"]
+
+    _, response = client.options("/api/items_add")
+    assert response.headers["Allow"] == "OPTIONS, POST"
+
+
+def test_batch_preflight_still_automatic(api, make_app):
+    register(api)
+    client = make_app(api).test_client
+
+    _, response = client.options(
+        "/api/_batch", headers={**PREFLIGHT, "Access-Control-Request-Method": "POST"}
+    )
+    assert response.status == 200
+    assert response.headers["Access-Control-Allow-Origin"]
+
+
+def test_method_fallbacks(api, make_app):
+    register(api)
+    client = make_app(api).test_client
+
+    _, response = client.head("/api/items")
+    assert response.status == 200
+
+    _, response = client.post("/api/items")
+    assert response.status == 405
+    assert response.headers["Allow"] == "GET, HEAD, OPTIONS"
+
+    _, response = client.get("/api/missing", headers={"Origin": "https://ops.example.com"})
+    assert response.status == 404
+
+    _, response = client.get("/api/items", headers={"Origin": "https://ops.example.com"})
+    assert response.status == 200
+    assert response.headers["Access-Control-Allow-Origin"]
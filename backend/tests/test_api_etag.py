@@ -0,0 +1,97 @@
+from core.server.api_etag import encoded_etag, matching_etag
+from core.server.compression import ResponseCompressor
+
+
+def test_version_token_skipped_on_cache_hit(api, make_app):
+    calls = {"version": 0, "endpoint": 0}
+
+    async def version(**_):
+        calls["version"] += 1
+        return 1
+
+    @api.get("versioned", cache={"ttl": 60}, etag=version)
+    async def versioned():
+        calls["endpoint"] += 1
+        return {"items": [1, 2, 3]}
+
+    client = make_app(api).test_client
+
+    _, first = client.get("/api/versioned")
+    _, second = client.get("/api/versioned")
+    assert first.status == second.status == 200
+    assert first.headers["ETag"] == second.headers["ETag"]
+    assert calls == {"version": 1, "endpoint": 1}
+
+    _, revalidated = client.get("/api/versioned", headers={"If-None-Match": first.headers["ETag"]})
+    assert revalidated.status == 304
+    assert calls == {"version": 2, "endpoint": 1}
+
+
+def test_version_change_bypasses_cached_body(api, make_app):
+    state = {"version": 1}
+
+    async def version(**_):
+        return state["version"]
+
+    @api.get("versioned", cache={"ttl": 60}, etag=version)
+    async def versioned():
+        return {"version": state["version"]}
+
+    client = make_app(api).test_client
+
+    _, first = client.get("/api/versioned")
+    state["version"] = 2
+    _, second = client.get("/api/versioned", headers={"If-None-Match": first.headers["ETag"]})
+    assert second.status == 200
+    assert second.json == {"version": 2}
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_content_etag_not_modified(api, make_app):
+    @api.get("hashed", etag=True)
+    async def hashed():
+        return {"items": [1, 2, 3]}
+
+    client = make_app(api).test_client
+
+    _, first = client.get("/api/hashed")
+    _, second = client.get("/api/hashed", headers={"If-None-Match": first.headers["ETag"]})
+    assert first.status == 200
+    assert second.status == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+def test_compressed_representation_has_its_own_etag(api, make_app):
+    @api.get("hashed", etag=True)
+    async def hashed():
+        return {"items": list(range(500))}
+
+    client = make_app(api, compressor=ResponseCompressor(min_size=64)).test_client
+
+    _, identity = client.get("/api/hashed", headers={"Accept-Encoding": "identity"})
+    _, gzipped = client.get("/api/hashed", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzipped.headers["ETag"] == encoded_etag(identity.headers["ETag"], "gzip")
+    assert gzipped.headers["ETag"] != identity.headers["ETag"]
+
+    # Each validator revalidates, and the 304 echoes the one the client holds
+    _, revalidated = client.get(
+        "/api/hashed", headers={"Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["ETag"]}
+    )
+    assert revalidated.status == 304
+    assert revalidated.headers["ETag"] == gzipped.headers["ETag"]
+
+    _, revalidated = client.get("/api/hashed", headers={"If-None-Match": f'W/{identity.headers["ETag"]}'})
+    assert revalidated.status == 304
+
+
+def test_etag_matching():
+    etag = '"abc"'
+    assert matching_etag('"abc"', etag) == '"abc"'
+    assert matching_etag('"xyz", W/"abc-gzip"', etag) == 'W/"abc-gzip"'
+    assert matching_etag('"abc-br"', etag) == '"abc-br"'
+    assert matching_etag("*", etag) == etag
+    assert matching_etag('"abc-zstd"', etag) is None
+    assert matching_etag(None, etag) is None
+    assert encoded_etag('W/"abc"', "br") == 'W/"abc-br"'
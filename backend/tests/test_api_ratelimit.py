@@ -0,0 +1,74 @@
+import pytest
+
+from core.api import api_ratelimit
+from core.api.api_ratelimit import TokenBucketLimiter, build_limiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(api_ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_then_refill(clock):
+    limiter = TokenBucketLimiter("login", rate=2, burst=3)
+    key = limiter.make_key("10.0.0.1", None)
+
+    assert [limiter.acquire(key) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire(key) == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert limiter.acquire(key) == 0.0
+    assert limiter.stats() == {"keys": 1, "allowed": 4, "rejected": 1}
+
+
+def test_keys_are_independent(clock):
+    limiter = TokenBucketLimiter("login", rate=1, by=("user",))
+    assert limiter.acquire(limiter.make_key("10.0.0.1", "alice")) == 0.0
+    assert limiter.acquire(limiter.make_key("10.0.0.1", "alice")) > 0
+    assert limiter.acquire(limiter.make_key("10.0.0.1", "bob")) == 0.0
+    # Anonymous callers fall back to their address
+    assert limiter.acquire(limiter.make_key("10.0.0.2", None)) == 0.0
+
+
+def test_idle_and_lru_eviction(clock):
+    limiter = TokenBucketLimiter("login", rate=1, burst=2, max_keys=2)
+    for ip in ("a", "b", "c"):
+        limiter.acquire((ip,))
+    assert limiter.stats()["keys"] == 2
+
+    clock.now += 10
+    limiter.acquire(("d",))
+    assert limiter.stats()["keys"] == 1
+
+
+def test_invalid_options():
+    assert build_limiter("login", None) is None
+    with pytest.raises(ValueError):
+        build_limiter("login", {"rate": 0})
+    with pytest.raises(ValueError):
+        build_limiter("login", {"rate": 1, "by": ("tenant",)})
+    with pytest.raises(ValueError):
+        build_limiter("login", 5)
+
+
+def test_gateway_answers_429(api, make_app):
+    @api.get("limited", rate_limit={"rate": 1, "burst": 1})
+    async def limited():
+        return {"ok": True}
+
+    client = make_app(api).test_client
+    assert client.get("/api/limited")[1].status == 200
+
+    _, response = client.get("/api/limited")
+    assert response.status == 429
+    assert int(response.headers["Retry-After"]) >= 1
@@ -0,0 +1,56 @@
+from pydantic import BaseModel, Field
+
+
+class ItemCreate(BaseModel):
+    name: str
+    count: int = Field(ge=0)
+
+
+def register(api, calls):
+    @api.post("items_create", schema=ItemCreate)
+    async def items_create(body: ItemCreate):
+        calls.append(body)
+        return body.model_dump()
+
+
+def test_valid_body_is_injected(api, make_app):
+    calls = []
+    register(api, calls)
+    client = make_app(api).test_client
+
+    _, response = client.post("/api/items_create", json={"name": "a", "count": 2})
+    assert response.status == 200
+    assert response.json == {"name": "a", "count": 2}
+    assert isinstance(calls[0], ItemCreate)
+
+
+def test_invalid_body_answers_400_before_the_endpoint(api, make_app):
+    calls = []
+    register(api, calls)
+    client = make_app(api).test_client
+
+    _, response = client.post("/api/items_create", json={"name": "a", "count": -1})
+    assert response.status == 400
+    assert "count" in response.text
+
+    _, response = client.post("/api/items_create", data="{not json")
+    assert response.status == 400
+
+    _, response = client.post("/api/items_create")
+    assert response.status == 400
+    assert "Request body is required" in response.text
+    assert calls == []
+
+
+def test_batch_entries_are_validated(api, make_app):
+    calls = []
+    register(api, calls)
+    client = make_app(api).test_client
+
+    _, response = client.post(
+        "/api/_batch",
+        json=[{"api": "items_create", "method": "POST", "body": {"name": "a"}}],
+    )
+    assert response.json[0]["status"] == 400
+    assert "count" in response.json[0]["error"]
+    assert calls == []
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from core.api.api_context import ApiContext
+from core.api.api_singleflight import SingleFlight
+from database import aio_session, replicas
+
+
+class FakeSession:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeReplica:
+    name = "replica0"
+
+    def __init__(self):
+        self.sessions = []
+
+    def session_factory(self):
+        session = FakeSession("replica")
+        self.sessions.append(session)
+        return session
+
+
+class FakeReplicaSet:
+    def __init__(self):
+        self.replica = FakeReplica()
+
+    def pick(self):
+        return self.replica
+
+    def is_sticky(self, client):
+        return False
+
+    def note_write(self, client):
+        pass
+
+
+@pytest.fixture
+def databases(monkeypatch):
+    """
+    Primary and replica session factories that record the sessions they open.
+    """
+    primary = []
+
+    def primary_factory():
+        session = FakeSession("primary")
+        primary.append(session)
+        return session
+
+    replica_set = FakeReplicaSet()
+    monkeypatch.setattr(aio_session, "_engine_pid", aio_session.os.getpid())
+    monkeypatch.setattr(aio_session, "AsyncSessionFactory", primary_factory)
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+    return primary, replica_set.replica.sessions
+
+
+def test_coalesced_get_reads_from_replica(api, make_app, databases):
+    primary, replica = databases
+
+    @api.get("coalesced_read", coalesce=True)
+    async def coalesced_read(user_id: int = 0):
+        context = ApiContext.current()
+        async with aio_session.get_async_session() as session:
+            return {"method": context.apimethod, "session": session.name}
+
+    app = make_app(api)
+    _, response = app.test_client.get("/api/coalesced_read", params={"user_id": 1})
+
+    assert response.status == 200
+    assert response.json == {"method": "GET", "session": "replica"}
+    assert primary == []
+    assert len(replica) == 1 and replica[0].closed
+
+
+def test_coalesced_call_does_not_share_leader_session():
+    flight = SingleFlight("read")
+    leader = ApiContext.create(ApiContext(apiname="read", apimethod="GET", user_id="7"))
+    leader.session = FakeSession("leader")
+    seen = []
+
+    async def call():
+        context = ApiContext.current()
+        seen.append(context)
+        await asyncio.sleep(0.01)
+        return context.session
+
+    async def run():
+        return await asyncio.gather(flight.do("key", call), flight.do("key", call))
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        leader.reset()
+
+    assert len(seen) == 1
+    shared = seen[0]
+    assert shared is not leader
+    assert shared.apimethod == "GET" and shared.user_id == "7"
+    assert results == [None, None]
+    assert ApiContext.current() is None
+    assert flight.stats()["followers"] == 1
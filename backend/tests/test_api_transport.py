@@ -0,0 +1,53 @@
+import logging
+
+import pytest
+
+from core.api.api_response import ApiResponse
+
+
+@pytest.fixture
+def sanic_errors(caplog):
+    caplog.set_level(logging.WARNING, logger="sanic.error")
+    return caplog
+
+
+def _not_sent(caplog):
+    return [r for r in caplog.records if "will not be sent" in r.getMessage()]
+
+
+def test_stream_is_sent_once(api, make_app, sanic_errors):
+    @api.get("streamed")
+    async def streamed():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk{i}\n"
+
+        return ApiResponse.stream(chunks)
+
+    app = make_app(api)
+    _, response = app.test_client.get("/api/streamed")
+    assert response.status == 200
+    assert response.text == "chunk0\nchunk1\nchunk2\n"
+    assert not _not_sent(sanic_errors)
+
+    _, metrics = app.test_client.get("/__metrics")
+    assert 'opspilot_api_response_size_bytes_sum{api="streamed",method="GET"} 21' in metrics.text
+
+
+def test_file_stream(api, make_app, sanic_errors, tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"x" * 5000)
+
+    @api.get("download")
+    async def download():
+        return ApiResponse.file_stream(str(path), content_type="text/plain")
+
+    app = make_app(api)
+    _, response = app.test_client.get("/api/download")
+    assert response.status == 200
+    assert len(response.content) == 5000
+
+    _, ranged = app.test_client.get("/api/download", headers={"Range": "bytes=0-99"})
+    assert ranged.status == 206
+    assert len(ranged.content) == 100
+    assert not _not_sent(sanic_errors)
@@ -0,0 +1,58 @@
+import asyncio
+import gzip
+from types import SimpleNamespace
+
+import pytest
+from sanic.compat import Header
+
+from core.server import compression
+from core.server.compression import ResponseCompressor, parse_accept_encoding
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding("gzip;q=0.5, br, identity;q=bogus") == {
+        "gzip": 0.5, "br": 1.0, "identity": 0.0,
+    }
+    assert parse_accept_encoding(None) == {}
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "br"),
+    ("gzip, br", "br"),
+    ("gzip;q=1, br;q=0.5", "gzip"),
+])
+def test_negotiate(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert ResponseCompressor().negotiate(header) == expected
+
+
+def run(compressor, body, accept="gzip", content_type="application/json", status=200, headers=None, method="GET"):
+    request = SimpleNamespace(method=method, headers=Header({"accept-encoding": accept}))
+    response = SimpleNamespace(body=body, status=status, content_type=content_type, headers=Header(headers or {}))
+    asyncio.run(compressor(request, response))
+    return response
+
+
+def test_compresses_and_suffixes_etag():
+    body = b'{"items": "' + b"x" * 4000 + b'"}'
+    response = run(ResponseCompressor(min_size=100), body, headers={"ETag": '"abc"'})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert gzip.decompress(response.body) == body
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"body": b"x" * 50},
+    {"body": b"x" * 4000, "content_type": "image/png"},
+    {"body": b"x" * 4000, "status": 304},
+    {"body": b"x" * 4000, "method": "HEAD"},
+    {"body": b"x" * 4000, "headers": {"Content-Encoding": "br"}},
+    {"body": b"x" * 4000, "accept": "identity"},
+])
+def test_left_alone(kwargs):
+    response = run(ResponseCompressor(min_size=100), **kwargs)
+    assert response.body == kwargs["body"]
@@ -0,0 +1,74 @@
+import asyncio
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from database import counting
+from database.counting import CountCache, cached_count, note_written
+
+metadata = sa.MetaData()
+items = sa.Table("items", metadata, sa.Column("id", sa.Integer, primary_key=True), sa.Column("kind", sa.String))
+tags = sa.Table("tags", metadata, sa.Column("id", sa.Integer, primary_key=True))
+
+
+class CountingSession:
+    def __init__(self, total):
+        self.total = total
+        self.calls = 0
+
+    async def scalar(self, statement, params=None):
+        self.calls += 1
+        return self.total
+
+
+def test_key_depends_on_shape_and_params():
+    stmt = sa.select(items).where(items.c.kind == sa.bindparam("kind"))
+    key = CountCache.make_key(stmt, {"kind": "a"})
+    assert key == CountCache.make_key(stmt.limit(10).offset(20), {"kind": "a"})
+    assert key != CountCache.make_key(stmt, {"kind": "b"})
+
+
+def test_invalidate_drops_only_the_written_tables():
+    cache = CountCache()
+    cache.set("items", 3, frozenset({"items"}))
+    cache.set("join", 5, frozenset({"items", "tags"}))
+    cache.set("tags", 7, frozenset({"tags"}))
+
+    cache.invalidate({"items"})
+    assert cache.get("items") is None
+    assert cache.get("join") is None
+    assert cache.get("tags") == 7
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+
+def test_entries_expire_and_are_evicted():
+    cache = CountCache(ttl=0, max_entries=2)
+    cache.set("a", 1, frozenset({"items"}))
+    assert cache.get("a") is None
+
+    cache = CountCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, 1, frozenset({"items"}))
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_commit_of_a_write_drops_cached_counts(monkeypatch):
+    monkeypatch.setattr(counting, "count_cache", CountCache())
+    stmt = sa.select(items)
+    session = CountingSession(3)
+
+    assert asyncio.run(cached_count(session, stmt)) == 3
+    session.total = 4
+    assert asyncio.run(cached_count(session, stmt)) == 3
+    assert session.calls == 1
+
+    writer = Session()
+    note_written(writer, {"items"})
+    assert asyncio.run(cached_count(session, stmt)) == 4
+
+    # A count cached while the write is uncommitted is dropped on commit
+    session.total = 5
+    writer.commit()
+    assert asyncio.run(cached_count(session, stmt)) == 5
+    assert session.calls == 3
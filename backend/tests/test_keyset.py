@@ -0,0 +1,103 @@
+import base64
+import json
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from core.exceptions import ParamError
+from database.keyset import KeysetPaginator
+from models.users import Users
+
+
+def user(id, **values):
+    values.setdefault("birthdate", None)
+    values.setdefault("created_at", None)
+    return SimpleNamespace(id=id, **values)
+
+
+@pytest.mark.parametrize("sortby, value", [
+    ("id", 42),
+    ("name", "alice"),
+    ("birthdate", date(1990, 5, 17)),
+    ("birthdate", None),
+    ("created_at", datetime(2024, 1, 2, 3, 4, 5, 678)),
+])
+@pytest.mark.parametrize("backward", [False, True])
+def test_cursor_round_trip(sortby, value, backward):
+    paginator = KeysetPaginator(Users, sortby, descending=True)
+    row = SimpleNamespace(**{"id": 42, sortby: value})
+
+    cursor = paginator.encode(row, backward=backward)
+    assert "=" not in cursor
+    assert paginator.decode(cursor) == (value, 42, backward)
+
+
+def test_cursor_bound_to_sort_order():
+    cursor = KeysetPaginator(Users, "age").encode(user(1, age=30))
+    with pytest.raises(ParamError):
+        KeysetPaginator(Users, "age", descending=True).decode(cursor)
+    with pytest.raises(ParamError):
+        KeysetPaginator(Users, "name").decode(cursor)
+
+
+def encoded(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize("sortby, cursor", [
+    ("age", "not a cursor"),
+    ("age", encoded([1, 2])),
+    ("age", encoded([1, "age", 0, 0, 30, None])),
+    ("birthdate", encoded([1, "birthdate", 0, 0, "yesterday", 1])),
+])
+def test_invalid_cursor(sortby, cursor):
+    with pytest.raises(ParamError):
+        KeysetPaginator(Users, sortby).decode(cursor)
+
+
+def test_expired_cursor_version():
+    with pytest.raises(ParamError, match="expired"):
+        KeysetPaginator(Users, "age").decode(encoded([0, "age", 0, 0, 30, 1]))
+
+
+def test_sort_column_whitelist():
+    with pytest.raises(ParamError):
+        KeysetPaginator(Users, "password", sortable=("name", "age"))
+
+
+def test_pages_forward_and_back():
+    paginator = KeysetPaginator(Users, "age")
+    rows = [user(i, age=20 + i) for i in range(1, 6)]
+
+    # First page: one extra row fetched, no previous page
+    page, next_cursor, prev_cursor = paginator.page(rows[:3], None, 2)
+    assert [r.id for r in page] == [1, 2]
+    assert prev_cursor is None
+    assert paginator.decode(next_cursor) == (22, 2, False)
+
+    # Middle page
+    page, next_cursor, prev_cursor = paginator.page(rows[2:5], next_cursor, 2)
+    assert [r.id for r in page] == [3, 4]
+    assert paginator.decode(prev_cursor) == (23, 3, True)
+
+    # Backward page: rows arrive in reverse order and are flipped back
+    page, next_cursor, prev_cursor = paginator.page([rows[1], rows[0]], prev_cursor, 2)
+    assert [r.id for r in page] == [1, 2]
+    assert prev_cursor is None
+    assert paginator.decode(next_cursor) == (22, 2, False)
+
+
+def test_seek_statement():
+    paginator = KeysetPaginator(Users, "age", descending=True)
+    cursor = paginator.encode(user(7, age=30))
+    stmt = paginator.apply(sa.select(Users.id), cursor, 10)
+    sql = str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    sql = sql.replace("opspilot.", "")
+
+    # age is nullable: NULLs sort after every value going forward
+    assert "users.age < 30 OR users.age = 30 AND users.id < 7 OR users.age IS NULL" in sql
+    assert "ORDER BY users.age DESC NULLS LAST, users.id DESC" in sql
+    assert "LIMIT 11" in sql
@@ -0,0 +1,53 @@
+import sys
+
+import pytest
+
+from core.utils import module_loader
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "fakeapis"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "a_api.py").write_text("")
+    monkeypatch.setattr(module_loader, "_package_path", lambda name: root)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield root
+    for name in list(sys.modules):
+        if name.startswith("fakeapis"):
+            del sys.modules[name]
+
+
+def test_manifest_rebuilt_when_modules_change(package, tmp_path):
+    manifest = str(tmp_path / "manifest.json")
+
+    module_loader.import_modules("fakeapis", manifest=manifest)
+    first = module_loader.load_manifest(manifest)
+    assert first["modules"] == ["fakeapis.a_api"]
+
+    # Unchanged package: the manifest is kept
+    module_loader.import_modules("fakeapis", manifest=manifest)
+    assert module_loader.load_manifest(manifest)["fingerprint"] == first["fingerprint"]
+
+    # Added module is imported and recorded
+    (package / "b_api.py").write_text("")
+    timings = module_loader.import_modules("fakeapis", manifest=manifest)
+    assert [name for name, _ in timings] == ["fakeapis.a_api", "fakeapis.b_api"]
+    assert module_loader.load_manifest(manifest)["modules"] == ["fakeapis.a_api", "fakeapis.b_api"]
+
+    # Removed module no longer breaks startup
+    (package / "a_api.py").unlink()
+    timings = module_loader.import_modules("fakeapis", manifest=manifest)
+    assert [name for name, _ in timings] == ["fakeapis.b_api"]
+    assert module_loader.load_manifest(manifest)["modules"] == ["fakeapis.b_api"]
+
+
+def test_imports_are_printed_only_with_report(package, capsys):
+    module_loader.import_modules("fakeapis")
+    assert capsys.readouterr().out == ""
+
+    module_loader.import_modules("fakeapis", report=True)
+    out = capsys.readouterr().out
+    assert "Imported fakeapis.a_api" in out
+    assert "Import time report:" in out
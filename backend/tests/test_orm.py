@@ -0,0 +1,44 @@
+import datetime
+import uuid
+
+import sqlalchemy as sa
+
+from database.orm import Serializer
+from models.users import Users
+
+
+def build_user(**values):
+    return Users(id=1, name="a", age=30, password="secret", birthdate=datetime.date(2000, 1, 31), **values)
+
+
+def test_serializer_leaves_out_excluded_columns():
+    data = build_user().to_dict()
+    assert "password" not in data
+    assert data["name"] == "a"
+    assert data["birthdate"] == datetime.date(2000, 1, 31)
+    assert set(data) == set(Users.serializer().keys)
+
+
+def test_serializer_is_built_once_per_model():
+    assert Users.serializer() is Users.serializer()
+    assert isinstance(Users.serializer(), Serializer)
+
+
+def test_converters_apply_to_set_values(monkeypatch):
+    monkeypatch.setattr(Users, "__converters__", {"created_by_id": str}, raising=False)
+    serializer = Serializer(Users)
+    user_id = uuid.uuid4()
+
+    assert serializer(build_user(created_by_id=user_id))["created_by_id"] == str(user_id)
+    assert serializer(build_user())["created_by_id"] is None
+
+
+def test_rows_and_instances_serialize_alike():
+    user = build_user()
+    values = {key: getattr(user, key) for key in Users.serializer().keys}
+
+    engine = sa.create_engine("sqlite://")
+    with engine.connect() as conn:
+        row = conn.execute(sa.select(*(sa.literal(v).label(k) for k, v in values.items()))).one()
+
+    assert Users.serialize_many([row, user]) == [user.to_dict(), user.to_dict()]
@@ -0,0 +1,31 @@
+import pytest
+import sqlalchemy as sa
+
+from core.exceptions import ParamError
+from database.projection import public_columns, rows_to_dicts
+from models.users import Users
+
+
+def test_public_columns_leave_out_password():
+    keys = [c.key for c in public_columns(Users)]
+    assert "password" not in keys
+    assert keys[:2] == ["id", "name"]
+    assert public_columns(Users) is public_columns(Users)
+
+    sql = str(sa.select(*public_columns(Users)).compile())
+    assert "password" not in sql
+
+
+def test_selected_columns_are_checked():
+    assert [c.key for c in public_columns(Users, ["name", Users.age])] == ["name", "age"]
+    with pytest.raises(ParamError):
+        public_columns(Users, ["password"])
+    with pytest.raises(ParamError):
+        public_columns(Users, ["missing"])
+
+
+def test_rows_to_dicts_drops_columns_past_the_keys():
+    assert rows_to_dicts(["id", "name"], [(1, "a", 10), (2, "b", 10)]) == [
+        {"id": 1, "name": "a"},
+        {"id": 2, "name": "b"},
+    ]
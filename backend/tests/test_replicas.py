@@ -0,0 +1,109 @@
+import asyncio
+import logging
+
+from core.api.api_context import ApiContext
+from database import replicas
+from database.replicas import Replica, ReplicaSet, client_key
+
+
+class FakeConnection:
+    def __init__(self, lag):
+        self.lag = lag
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scalar(self, statement):
+        return self.lag
+
+
+class FakeEngine:
+    def __init__(self, lag=0.0):
+        self.lag = lag
+
+    def connect(self):
+        return FakeConnection(self.lag)
+
+
+def build_set(count, healthy=True, **kwargs):
+    replica_set = ReplicaSet([], engine_factory=None, session_factory=None, **kwargs)
+    for index in range(count):
+        replica = Replica(f"replica{index}", engine=FakeEngine(), session_factory=None)
+        replica.healthy = healthy
+        replica_set.replicas.append(replica)
+    return replica_set
+
+
+def test_failed_replica_is_logged_and_skipped(caplog):
+    replica_set = build_set(1)
+    replica = replica_set.replicas[0]
+    assert replica_set.pick() is replica
+
+    with caplog.at_level(logging.WARNING, logger="sanic.root"):
+        replica_set.mark_failed(replica, "connection refused")
+        replica_set.mark_failed(replica, "connection refused")
+
+    warnings = [r.getMessage() for r in caplog.records if r.name == "sanic.root"]
+    assert warnings == ["Read replica replica0 unavailable: connection refused"]
+    assert replica_set.pick() is None
+    assert replica_set.stats()["fallbacks"] == 1
+
+
+def test_replica_waits_for_first_probe():
+    replica_set = build_set(1, healthy=False)
+    replica = replica_set.replicas[0]
+    assert replica_set.pick() is None
+
+    asyncio.run(replica_set.check(replica))
+    assert replica.healthy
+    assert replica_set.pick() is replica
+
+
+def test_round_robin_skips_unusable_replicas():
+    replica_set = build_set(3, max_lag=5.0)
+    first, second, third = replica_set.replicas
+    assert [replica_set.pick() for _ in range(4)] == [first, second, third, first]
+
+    second.lag = 10.0
+    third.healthy = False
+    assert [replica_set.pick() for _ in range(3)] == [first, first, first]
+
+
+def test_lagging_replicas_fall_back_to_primary():
+    replica_set = build_set(2, max_lag=1.0)
+    for replica in replica_set.replicas:
+        replica.engine = FakeEngine(lag=3.0)
+        asyncio.run(replica_set.check(replica))
+
+    assert all(r.healthy and r.lag == 3.0 for r in replica_set.replicas)
+    assert replica_set.pick() is None
+    assert replica_set.stats()["fallbacks"] == 1
+
+
+def test_writes_pin_reads_to_primary(monkeypatch):
+    replica_set = build_set(1, sticky_seconds=60)
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+
+    writer = ApiContext(user_id="7", remote_addr="10.0.0.1")
+    reader = ApiContext(user_id="7", remote_addr="10.0.0.2")
+    other = ApiContext(remote_addr="10.0.0.1")
+    assert client_key(writer) == "user:7"
+    assert client_key(other) == "addr:10.0.0.1"
+
+    writer.wrote = True
+    assert replicas.route(writer) is None
+    replica_set.note_write(client_key(writer))
+
+    # The same user reads from the primary; other clients keep the replica
+    assert replicas.route(reader) is None
+    assert replicas.route(other) is replica_set.replicas[0]
+
+
+def test_stickiness_expires(monkeypatch):
+    replica_set = build_set(1, sticky_seconds=0)
+    replica_set.note_write("addr:10.0.0.1")
+    monkeypatch.setattr(replicas.time, "monotonic", lambda: 1e12)
+    assert not replica_set.is_sticky("addr:10.0.0.1")
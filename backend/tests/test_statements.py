@@ -0,0 +1,49 @@
+import sqlalchemy as sa
+
+from database import statements
+from database.statements import StatementCache
+
+
+def test_statements_are_built_once_per_shape():
+    cache = StatementCache()
+    builds = []
+
+    def build():
+        builds.append(1)
+        return sa.select(sa.literal_column("1")).where(sa.bindparam("id") > 0)
+
+    first = cache.get(("shape", 1), build)
+    assert cache.get(("shape", 1), build) is first
+    assert cache.get(("shape", 2), build) is not first
+    assert len(builds) == 2
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 2, "hit_rate": 0.3333}
+
+
+def test_least_recently_used_shape_is_evicted():
+    cache = StatementCache(max_entries=2)
+    cache.get("a", object)
+    cache.get("b", object)
+    cache.get("a", object)
+    cache.get("c", object)
+
+    assert cache.stats()["entries"] == 2
+    cache.get("a", object)
+    cache.get("b", object)
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 4
+
+    cache.clear()
+    assert cache.stats()["entries"] == 0
+
+
+def test_users_query_reuses_its_statement(monkeypatch):
+    from service.users_service import _users_query
+
+    monkeypatch.setattr(statements, "statement_cache", StatementCache())
+    stmt = _users_query(True, "id", False, True)
+    assert _users_query(True, "id", False, True) is stmt
+    assert _users_query(False, "id", False, True) is not stmt
+
+    # Values are bound at execution time, so the SQL text never changes
+    sql = str(stmt.compile())
+    assert ":status" in sql and ":limit" in sql and "password" not in sql